@@ -1,6 +1,6 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.utils.html import format_html
-from .models import PostalBoundaries, AssessmentResponse, PincodeStats
+from .models import PostalBoundaries, AssessmentResponse, PincodeStats, STRESS_LEVELS
 from django.contrib.gis.admin import GISModelAdmin
 
 @admin.register(PostalBoundaries)
@@ -70,27 +70,46 @@ class AssessmentResponseAdmin(admin.ModelAdmin):
         return False
 
 
+class StressLevelFilter(admin.SimpleListFilter):
+    title = "stress level"
+    parameter_name = 'stress_level'
+
+    def lookups(self, request, model_admin):
+        return [(level, level.title()) for _, level, _ in STRESS_LEVELS]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(stress_level=self.value())
+        return queryset
+
+
 @admin.register(PincodeStats)
 class PincodeStatsAdmin(admin.ModelAdmin):
     list_display = ['pincode', 'total_assessments', 'average_score_display', 
                    'stress_level_display', 'last_updated', 'distribution_summary']
+    list_filter = [StressLevelFilter]
     search_fields = ['pincode']
-    readonly_fields = ['pincode', 'total_assessments', 'average_score', 
+    readonly_fields = ['pincode', 'total_assessments', 'average_score', 'score_sum',
+                      'score_histogram',
                       'excellent_count', 'good_count', 'moderate_count', 
                       'concerning_count', 'last_updated']
     list_per_page = 50
     
+    def get_queryset(self, request):
+        # Stress level and color come from SQL, filterable and sortable
+        return super().get_queryset(request).with_stress_level()
+    
     def average_score_display(self, obj):
         return f"{obj.average_score:.2f}"
     average_score_display.short_description = "Avg Score"
     
     def stress_level_display(self, obj):
-        level, color = obj.get_stress_level()
         return format_html(
             '<span style="background-color: {}; color: white; padding: 3px 10px; border-radius: 3px;">{}</span>',
-            color, level.upper()
+            obj.color, obj.stress_level.upper()
         )
     stress_level_display.short_description = "Stress Level"
+    stress_level_display.admin_order_field = 'average_score'
     
     def distribution_summary(self, obj):
         return format_html(
@@ -112,9 +131,10 @@ class PincodeStatsAdmin(admin.ModelAdmin):
     actions = ['recalculate_stats']
     
     def recalculate_stats(self, request, queryset):
-        count = 0
-        for stats in queryset:
-            stats.update_stats()
-            count += 1
+        try:
+            count = PincodeStats.rebuild(pincodes=list(queryset.values_list('pincode', flat=True)))
+        except ValueError as e:
+            self.message_user(request, str(e), level=messages.ERROR)
+            return
         self.message_user(request, f"Successfully recalculated statistics for {count} pincodes.")
     recalculate_stats.short_description = "Recalculate selected statistics"
\ No newline at end of file
@@ -0,0 +1,236 @@
+"""
+Bulk loading of postal_boundaries from a GeoJSON/GeoPackage/Shapefile
+
+Features are COPYed into an unlogged staging table, repaired and
+reprojected into a fresh table that gets its indexes, is clustered and
+analyzed, and is then swapped in with renames inside one transaction.
+Readers never see a half-loaded or unindexed table.
+"""
+import csv
+import io
+import logging
+
+from django.contrib.gis.gdal import DataSource
+from django.db import connection, transaction
+
+from .models import PostalBoundaries
+
+logger = logging.getLogger(__name__)
+
+TABLE = PostalBoundaries._meta.db_table
+STAGING_TABLE = f'{TABLE}_staging'
+NEW_TABLE = f'{TABLE}_new'
+OLD_TABLE = f'{TABLE}_old'
+
+# Source attribute names tried for each column, compared case-insensitively
+SOURCE_FIELDS = {
+    'pincode': ['pincode', 'pin_code', 'pin'],
+    'office_name': ['office_name', 'officename', 'office'],
+    'division': ['division', 'divisionname', 'division_name'],
+    'region': ['region', 'regionname', 'region_name'],
+    'circle': ['circle', 'circlename', 'circle_name'],
+}
+COLUMNS = list(SOURCE_FIELDS)
+
+# Features sent per COPY
+COPY_BATCH_SIZE = 5000
+
+SWAP_LOCK_TIMEOUT = '10s'
+
+
+def resolve_fields(layer_fields, overrides=None):
+    """
+    Map each column to a source attribute name (or None when absent)
+    `overrides` maps column -> source attribute and wins over the defaults
+    """
+    overrides = overrides or {}
+    by_lower = {name.lower(): name for name in layer_fields}
+    mapping = {}
+    for column, candidates in SOURCE_FIELDS.items():
+        if column in overrides:
+            if overrides[column] not in layer_fields:
+                raise ValueError(f"Source has no field {overrides[column]!r}")
+            mapping[column] = overrides[column]
+            continue
+        mapping[column] = next(
+            (by_lower[name] for name in candidates if name in by_lower), None
+        )
+    if mapping['pincode'] is None:
+        raise ValueError("Could not find a pincode field, pass one explicitly")
+    return mapping
+
+
+def _clean(value):
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    value = str(value).strip()
+    return value or None
+
+
+def _copy_rows(cursor, rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY {STAGING_TABLE} ({', '.join(COLUMNS)}, geom) FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+
+
+def _stage(cursor, layer, mapping):
+    """COPY every feature with a geometry into the staging table"""
+    cursor.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+    cursor.execute(f"""
+        CREATE UNLOGGED TABLE {STAGING_TABLE} (
+            pincode text, office_name text, division text, region text, circle text,
+            geom geometry
+        )
+    """)
+
+    staged = skipped = 0
+    batch = []
+    for feature in layer:
+        try:
+            geom_hex = feature.geom.hex
+        except Exception:
+            skipped += 1
+            continue
+
+        batch.append([
+            _clean(feature.get(mapping[column])) if mapping[column] else None
+            for column in COLUMNS
+        ] + [geom_hex])
+
+        if len(batch) >= COPY_BATCH_SIZE:
+            _copy_rows(cursor, batch)
+            staged += len(batch)
+            batch = []
+
+    if batch:
+        _copy_rows(cursor, batch)
+        staged += len(batch)
+
+    return staged, skipped
+
+
+def _build_table(cursor, source_srid):
+    """
+    Repaired, EPSG:4326 copy of the staging rows in NEW_TABLE with a GiST
+    index on the geometry, a B-tree on pincode, clustered and analyzed
+    Returns (rows loaded, invalid geometries repaired)
+    """
+    cursor.execute(f"SELECT count(*) FROM {STAGING_TABLE} WHERE NOT ST_IsValid(geom)")
+    repaired = cursor.fetchone()[0]
+
+    cursor.execute(f"DROP TABLE IF EXISTS {NEW_TABLE}")
+    cursor.execute(f"""
+        CREATE TABLE {NEW_TABLE} (
+            ogc_fid serial PRIMARY KEY,
+            wkb_geometry geometry(Geometry, 4326),
+            pincode varchar(10),
+            office_name varchar(200),
+            division varchar(100),
+            region varchar(100),
+            circle varchar(100)
+        )
+    """)
+    cursor.execute(f"""
+        INSERT INTO {NEW_TABLE} (wkb_geometry, pincode, office_name, division, region, circle)
+        SELECT geom, left(pincode, 10), left(office_name, 200),
+               left(division, 100), left(region, 100), left(circle, 100)
+        FROM (
+            SELECT
+                ST_CollectionExtract(ST_MakeValid(ST_Transform(
+                    CASE WHEN ST_SRID(geom) = 0 THEN ST_SetSRID(geom, %s) ELSE geom END,
+                    4326
+                )), 3) AS geom,
+                pincode, office_name, division, region, circle
+            FROM {STAGING_TABLE}
+        ) repaired
+        WHERE NOT ST_IsEmpty(geom)
+    """, [source_srid])
+    loaded = cursor.rowcount
+
+    cursor.execute(f"CREATE INDEX {NEW_TABLE}_wkb_geometry_gist ON {NEW_TABLE} USING gist (wkb_geometry)")
+    cursor.execute(f"CREATE INDEX {NEW_TABLE}_pincode_btree ON {NEW_TABLE} (pincode)")
+    cursor.execute(f"CLUSTER {NEW_TABLE} USING {NEW_TABLE}_wkb_geometry_gist")
+    cursor.execute(f"ANALYZE {NEW_TABLE}")
+    cursor.execute(f"DROP TABLE {STAGING_TABLE}")
+
+    return loaded, repaired
+
+
+def _rename_table(cursor, old, new):
+    """Rename a table along with the indexes and sequences named after it"""
+    cursor.execute("""
+        SELECT c.relname, 'INDEX'
+        FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = %s::regclass
+        UNION ALL
+        SELECT c.relname, 'SEQUENCE'
+        FROM pg_depend d JOIN pg_class c ON c.oid = d.objid
+        WHERE c.relkind = 'S' AND d.refobjid = %s::regclass AND d.deptype IN ('a', 'i')
+    """, [old, old])
+    for name, kind in cursor.fetchall():
+        if name.startswith(old):
+            quoted = connection.ops.quote_name(name)
+            renamed = connection.ops.quote_name(new + name[len(old):])
+            cursor.execute(f"ALTER {kind} {quoted} RENAME TO {renamed}")
+    cursor.execute(f"ALTER TABLE {old} RENAME TO {new}")
+
+
+def _swap(cursor, keep_old):
+    """
+    Replace TABLE with NEW_TABLE in one transaction
+    Simplified copies are keyed on ogc_fid, which the new table renumbers,
+    so they are emptied in the same transaction; until they are rebuilt
+    the map falls back to full geometry
+    """
+    # Imported here: stressmap depends on this app
+    from stressmap.cache import bump_data_version
+    from stressmap.models import SimplifiedBoundary
+
+    with transaction.atomic():
+        cursor.execute(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'")
+        cursor.execute(f"DROP TABLE IF EXISTS {OLD_TABLE}")
+        cursor.execute("SELECT to_regclass(%s)", [TABLE])
+        if cursor.fetchone()[0] is not None:
+            _rename_table(cursor, TABLE, OLD_TABLE)
+            if not keep_old:
+                cursor.execute(f"DROP TABLE {OLD_TABLE}")
+        _rename_table(cursor, NEW_TABLE, TABLE)
+        cursor.execute(f"DELETE FROM {SimplifiedBoundary._meta.db_table}")
+        transaction.on_commit(bump_data_version)
+
+
+def load_boundaries(path, layer=0, srid=None, fields=None, keep_old=False):
+    """
+    Load postal boundaries from any OGR-readable file and swap them in
+    `srid` overrides the source projection (4326 when the file has none)
+    Returns counts of staged, loaded, repaired and skipped features
+    """
+    source = DataSource(path)
+    source_layer = source[layer]
+    mapping = resolve_fields(source_layer.fields, fields)
+
+    if srid is None:
+        srid = source_layer.srs.srid if source_layer.srs else None
+        if srid is None:
+            logger.warning(f"No EPSG code for {path}, assuming EPSG:4326")
+            srid = 4326
+
+    with connection.cursor() as cursor:
+        staged, skipped = _stage(cursor, source_layer, mapping)
+        loaded, repaired = _build_table(cursor, srid)
+        _swap(cursor, keep_old)
+
+    return {
+        'staged': staged,
+        'loaded': loaded,
+        'repaired': repaired,
+        'skipped': skipped,
+        'srid': srid,
+        'fields': mapping,
+    }
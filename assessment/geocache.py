@@ -0,0 +1,133 @@
+"""
+Geohash-quantized cache for reverse pincode lookups
+
+Nearby coordinates share a geohash cell. A cell lying entirely inside one
+pincode polygon is answered from the cache; a cell crossing a border is
+remembered as such and always gets an exact lookup.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Marker for cells that cross a pincode border
+STRADDLES = object()
+
+
+def geohash_encode(lat, lng, precision):
+    """Standard base32 geohash of a point"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits = bits << 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+
+        if bit_count == 5:
+            chars.append(GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(chars)
+
+
+def geohash_bounds(geohash):
+    """Cell of a geohash as (min_lng, min_lat, max_lng, max_lat)"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    even = True
+
+    for char in geohash:
+        bits = GEOHASH_BASE32.index(char)
+        for shift in range(4, -1, -1):
+            rng = lng_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if bits >> shift & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+
+    return lng_range[0], lat_range[0], lng_range[1], lat_range[1]
+
+
+class LocationCache:
+    """Bounded LRU of geohash cell -> lookup result, with a TTL"""
+
+    def __init__(self, max_entries=10000, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.straddles = 0
+
+    def get(self, key):
+        """Return the cached value, STRADDLES, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                if entry[0] is STRADDLES:
+                    self.straddles += 1
+                else:
+                    self.hits += 1
+                return entry[0]
+
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses + self.straddles
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'straddles': self.straddles,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+location_cache = LocationCache(
+    max_entries=getattr(settings, 'PINCODE_LOCATION_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'PINCODE_LOCATION_CACHE_TTL', 3600),
+)
+
+
+def cache_enabled():
+    return getattr(settings, 'PINCODE_LOCATION_CACHE_ENABLED', True)
+
+
+def cell_precision():
+    """Geohash length; 7 characters is a cell of roughly 150 m"""
+    return getattr(settings, 'PINCODE_LOCATION_CACHE_PRECISION', 7)
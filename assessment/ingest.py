@@ -0,0 +1,74 @@
+"""
+Write-behind ingestion of assessment submissions
+
+With ASSESSMENT_BUFFERED_SUBMISSIONS on, submit_assessment only stores a
+PendingSubmission row and answers at once. flush_pending_submissions(),
+run by the flush_submissions command, moves them into AssessmentResponse
+in batches and merges each batch into PincodeStats with one statement.
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AssessmentResponse, PendingSubmission, PincodeStats
+
+logger = logging.getLogger(__name__)
+
+FLUSH_BATCH_SIZE = 1000
+
+
+def buffering_enabled():
+    return getattr(settings, 'ASSESSMENT_BUFFERED_SUBMISSIONS', False)
+
+
+def enqueue_submission(**fields):
+    """Durably queue a validated submission"""
+    return PendingSubmission.objects.create(**fields)
+
+
+def flush_batch(batch_size=FLUSH_BATCH_SIZE):
+    """
+    Move up to `batch_size` queued submissions into AssessmentResponse
+    Rows are claimed with SKIP LOCKED, so several flushers can run at once
+    Returns the number of submissions flushed
+    """
+    with transaction.atomic():
+        pending = list(
+            PendingSubmission.objects
+            .select_for_update(skip_locked=True)
+            .order_by('id')[:batch_size]
+        )
+        if not pending:
+            return 0
+
+        AssessmentResponse.objects.bulk_create([
+            AssessmentResponse(
+                pincode=item.pincode,
+                score=item.score,
+                max_score=item.max_score,
+                user_fingerprint=item.user_fingerprint,
+                ip_address_hash=item.ip_address_hash,
+                user_agent_hash=item.user_agent_hash,
+                timestamp=item.submitted_at
+            )
+            for item in pending
+        ])
+        PincodeStats.record_scores(
+            (item.pincode, item.score, item.max_score, timezone.localdate(item.submitted_at))
+            for item in pending
+        )
+        PendingSubmission.objects.filter(id__in=[item.id for item in pending]).delete()
+
+    return len(pending)
+
+
+def flush_pending_submissions(batch_size=FLUSH_BATCH_SIZE):
+    """Flush batches until the queue is empty; returns the total flushed"""
+    total = 0
+    while True:
+        flushed = flush_batch(batch_size)
+        total += flushed
+        if flushed < batch_size:
+            return total
@@ -0,0 +1,293 @@
+"""
+Point-to-pincode lookup
+
+Lookups go through a geohash cell cache first, then an optional
+in-process STR-tree of prepared boundary geometries
+(PINCODE_LOCATOR_ENABLED), and fall back to a containment query against
+PostGIS.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.gis.db.models.functions import AsWKB
+from django.db import connection
+
+from .geocache import (
+    STRADDLES,
+    cache_enabled,
+    cell_precision,
+    geohash_bounds,
+    geohash_encode,
+    location_cache,
+)
+from .models import PostalBoundaries
+
+try:
+    import shapely
+    from shapely.strtree import STRtree
+except ImportError:  # optional dependency
+    shapely = None
+
+logger = logging.getLogger(__name__)
+
+BOUNDARY_FIELDS = ('pincode', 'office_name', 'division', 'region', 'circle')
+
+
+def boundary_table_signature():
+    """
+    Cheap fingerprint of postal_boundaries
+    Changes whenever rows are written or the table is replaced
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT relid, n_tup_ins, n_tup_upd, n_tup_del
+            FROM pg_stat_user_tables
+            WHERE relname = %s
+        """, [PostalBoundaries._meta.db_table])
+        return cursor.fetchone()
+
+
+class BoundaryWatcher:
+    """
+    Calls on_change() when postal_boundaries changes, for in-process copies
+    of the table
+    The signature is re-checked at most every `setting` seconds (300 by
+    default). Only the first check blocks; later ones are skipped while
+    another thread runs one, so readers keep the old data meanwhile
+    """
+
+    def __init__(self, on_change, setting):
+        self._on_change = on_change
+        self._setting = setting
+        self._lock = threading.Lock()
+        self._signature = None
+        self._checked_at = None
+
+    @property
+    def refresh_interval(self):
+        return getattr(settings, self._setting, 300)
+
+    def _due(self, now):
+        return self._checked_at is None or now - self._checked_at >= self.refresh_interval
+
+    def _check(self, now, force=False):
+        signature = boundary_table_signature()
+        if force or self._checked_at is None or signature != self._signature:
+            self._on_change()
+        self._signature = signature
+        self._checked_at = now
+
+    def ensure_fresh(self):
+        now = time.monotonic()
+        if not self._due(now):
+            return
+        if not self._lock.acquire(blocking=self._checked_at is None):
+            return
+        try:
+            if self._due(now):
+                self._check(now)
+        finally:
+            self._lock.release()
+
+    def refresh(self):
+        """Call on_change() now, whatever the signature"""
+        with self._lock:
+            self._check(time.monotonic(), force=True)
+
+
+class PincodeLocator:
+    """
+    Boundaries loaded once per worker into an STR-tree of prepared geometries
+    The table signature is re-checked every PINCODE_LOCATOR_REFRESH_SECONDS
+    and the tree is rebuilt when it changes
+    """
+
+    def __init__(self):
+        self._tree = None
+        self._geometries = None
+        self._records = []
+        self._watcher = BoundaryWatcher(self.load, 'PINCODE_LOCATOR_REFRESH_SECONDS')
+
+    @property
+    def enabled(self):
+        return shapely is not None and getattr(settings, 'PINCODE_LOCATOR_ENABLED', False)
+
+    def load(self):
+        """Read every boundary and rebuild the tree"""
+        blobs = []
+        records = []
+        rows = (
+            PostalBoundaries.objects
+            .filter(wkb_geometry__isnull=False)
+            .order_by('ogc_fid')
+            .annotate(wkb=AsWKB('wkb_geometry'))
+            .values_list('wkb', *BOUNDARY_FIELDS)
+            .iterator(chunk_size=1000)
+        )
+        for wkb, *fields in rows:
+            blobs.append(bytes(wkb))
+            records.append(dict(zip(BOUNDARY_FIELDS, fields)))
+
+        geometries = shapely.from_wkb(blobs)
+        shapely.prepare(geometries)
+
+        self._tree = STRtree(geometries)
+        self._geometries = geometries
+        self._records = records
+        location_cache.clear()
+        logger.info(f"Pincode locator loaded {len(records)} boundaries")
+
+    def locate(self, lng, lat, cell=None):
+        """
+        Return (details, covers_cell) for the polygon containing the point
+        details is None when no polygon matches; covers_cell tells whether
+        the polygon also contains the whole cell bbox
+        """
+        self._watcher.ensure_fresh()
+        matches = self._tree.query(shapely.Point(lng, lat), predicate='within')
+        if len(matches) == 0:
+            return None, False
+
+        index = int(matches.min())
+        covers_cell = cell is not None and self._geometries[index].contains(shapely.box(*cell))
+        return self._records[index], covers_cell
+
+
+locator = PincodeLocator()
+
+
+# Clears the cell cache on boundary changes, whether or not the locator is enabled
+cache_watcher = BoundaryWatcher(location_cache.clear, 'PINCODE_LOCATION_CACHE_REFRESH_SECONDS')
+
+
+def _database_locate(lng, lat, cell=None):
+    """Containment lookup in PostGIS; same return shape as PincodeLocator.locate()"""
+    columns = ', '.join(BOUNDARY_FIELDS)
+    covers_cell = (
+        'ST_Contains(wkb_geometry, ST_MakeEnvelope(%s, %s, %s, %s, 4326))'
+        if cell else 'false'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT {columns}, {covers_cell}
+            FROM {PostalBoundaries._meta.db_table}
+            WHERE ST_Contains(wkb_geometry, ST_SetSRID(ST_MakePoint(%s, %s), 4326))
+            LIMIT 1
+        """, [*(cell or ()), lng, lat])
+        row = cursor.fetchone()
+
+    if row is None:
+        return None, False
+    return dict(zip(BOUNDARY_FIELDS, row[:-1])), row[-1]
+
+
+def _exact_locate(lng, lat, cell=None):
+    if locator.enabled:
+        try:
+            return locator.locate(lng, lat, cell)
+        except Exception as e:
+            logger.warning(f"Pincode locator failed, falling back to database: {str(e)}")
+    return _database_locate(lng, lat, cell)
+
+
+def find_pincode_area(lng, lat):
+    """
+    Return pincode/office/division/region/circle for a point, or None
+    Answered from the cell cache when possible, then the in-process
+    locator when enabled, PostGIS otherwise
+    """
+    if not cache_enabled():
+        return _exact_locate(lng, lat)[0]
+
+    cache_watcher.ensure_fresh()
+    key = geohash_encode(lat, lng, cell_precision())
+    cached = location_cache.get(key)
+    if cached is STRADDLES:
+        return _exact_locate(lng, lat)[0]
+    if cached is not None:
+        return cached
+
+    area, covers_cell = _exact_locate(lng, lat, geohash_bounds(key))
+    location_cache.set(key, area if covers_cell else STRADDLES)
+    return area
+
+
+def nearest_max_distance():
+    """Search radius in metres for the nearest-boundary fallback; 0 disables it"""
+    return getattr(settings, 'PINCODE_NEAREST_MAX_DISTANCE_M', 2000)
+
+
+def find_nearest_pincode_area(lng, lat, max_distance_m=None):
+    """
+    Nearest boundary to a point that falls outside every polygon
+    (coastlines, rivers, gaps between boundaries)
+    The KNN operator walks the GiST index for a few candidates, which are
+    then ranked by true distance in metres
+    Returns (details, distance_m), or (None, None) when nothing is in range
+    """
+    if max_distance_m is None:
+        max_distance_m = nearest_max_distance()
+    if not max_distance_m:
+        return None, None
+
+    columns = ', '.join(BOUNDARY_FIELDS)
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            WITH point AS (
+                SELECT ST_SetSRID(ST_MakePoint(%(lng)s, %(lat)s), 4326) AS geom
+            )
+            SELECT {columns}, distance_m
+            FROM (
+                SELECT {columns},
+                       ST_Distance(b.wkb_geometry::geography, point.geom::geography) AS distance_m
+                FROM {PostalBoundaries._meta.db_table} b, point
+                WHERE b.wkb_geometry IS NOT NULL
+                ORDER BY b.wkb_geometry <-> point.geom
+                LIMIT %(candidates)s
+            ) nearest
+            WHERE distance_m <= %(max_distance)s
+            ORDER BY distance_m
+            LIMIT 1
+        """, {
+            'lng': lng,
+            'lat': lat,
+            'candidates': getattr(settings, 'PINCODE_NEAREST_CANDIDATES', 5),
+            'max_distance': max_distance_m,
+        })
+        row = cursor.fetchone()
+
+    if row is None:
+        return None, None
+    return dict(zip(BOUNDARY_FIELDS, row[:-1])), row[-1]
+
+
+def find_pincode_areas(points):
+    """
+    Resolve many (lng, lat) points with one set-based spatial join
+    Returns details or None for each point, in input order
+    """
+    if not points:
+        return []
+
+    lngs, lats = zip(*points)
+    columns = ', '.join(f'b.{field}' for field in BOUNDARY_FIELDS)
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT p.idx, b.matched, {columns}
+            FROM unnest(%s::float8[], %s::float8[]) WITH ORDINALITY AS p(lng, lat, idx)
+            LEFT JOIN LATERAL (
+                SELECT true AS matched, {', '.join(BOUNDARY_FIELDS)}
+                FROM {PostalBoundaries._meta.db_table}
+                WHERE ST_Contains(wkb_geometry, ST_SetSRID(ST_MakePoint(p.lng, p.lat), 4326))
+                LIMIT 1
+            ) b ON true
+            ORDER BY p.idx
+        """, [list(lngs), list(lats)])
+        rows = cursor.fetchall()
+
+    return [
+        dict(zip(BOUNDARY_FIELDS, row[2:])) if row[1] else None
+        for row in rows
+    ]
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from assessment.partitions import archive_partitions_before
+
+
+class Command(BaseCommand):
+    help = (
+        "Export AssessmentResponse partitions older than a month as gzipped "
+        "CSV, then detach and drop them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--before',
+            required=True,
+            help="Archive months before this one (YYYY-MM)"
+        )
+        parser.add_argument(
+            '--output-dir',
+            required=True,
+            help="Directory for the .csv.gz exports"
+        )
+        parser.add_argument(
+            '--keep-table',
+            action='store_true',
+            help="Leave the detached table in place after exporting"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            cutoff = datetime.strptime(options['before'], '%Y-%m').date()
+        except ValueError:
+            raise CommandError("--before must look like YYYY-MM")
+
+        archived = archive_partitions_before(
+            cutoff, options['output_dir'], drop=not options['keep_table']
+        )
+        for month, path, rows in archived:
+            self.stdout.write(f"{month:%Y-%m}: {rows} responses -> {path}")
+
+        self.stdout.write(self.style.SUCCESS(f"{len(archived)} partitions archived"))
+        if archived:
+            self.stdout.write(self.style.WARNING(
+                "Archived responses are no longer seen by rebuild_pincode_stats, "
+                "which now refuses to run without --allow-archived"
+            ))
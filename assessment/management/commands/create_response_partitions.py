@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from assessment.partitions import ensure_partitions
+
+
+class Command(BaseCommand):
+    help = "Create the monthly AssessmentResponse partitions for the coming months"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months',
+            type=int,
+            default=3,
+            help="Months ahead of the current one to cover"
+        )
+
+    def handle(self, *args, **options):
+        created = ensure_partitions(options['months'])
+        for month in created:
+            self.stdout.write(f"Created partition for {month:%Y-%m}")
+        self.stdout.write(self.style.SUCCESS(f"{len(created)} partitions created"))
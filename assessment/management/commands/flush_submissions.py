@@ -0,0 +1,44 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections
+
+from assessment.ingest import FLUSH_BATCH_SIZE, flush_pending_submissions
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Move buffered submissions into AssessmentResponse and merge them into PincodeStats"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=FLUSH_BATCH_SIZE,
+            help="Submissions written per transaction"
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            help="Keep running and flush every INTERVAL seconds"
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                flushed = flush_pending_submissions(options['batch_size'])
+            except OperationalError as e:
+                # Deadlocks and lost connections; the batch is retried next tick
+                if options['interval'] is None:
+                    raise
+                logger.error(f"Error flushing submissions: {str(e)}", exc_info=True)
+                close_old_connections()
+                time.sleep(options['interval'])
+                continue
+            if flushed or options['interval'] is None:
+                self.stdout.write(self.style.SUCCESS(f"Flushed {flushed} submissions"))
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,81 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from assessment.boundaries import COLUMNS, load_boundaries
+
+
+class Command(BaseCommand):
+    help = "Bulk-load postal_boundaries from a GeoJSON/GeoPackage/Shapefile and swap it in"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File readable by GDAL/OGR")
+        parser.add_argument(
+            '--layer',
+            default=0,
+            help="Layer name or index (default: first layer)"
+        )
+        parser.add_argument(
+            '--srid',
+            type=int,
+            help="Source SRID, overriding the one the file declares (default: the file's, else 4326)"
+        )
+        parser.add_argument(
+            '--field',
+            action='append',
+            default=[],
+            metavar='COLUMN=SOURCE',
+            help=f"Source attribute for a column ({', '.join(COLUMNS)}); can be repeated"
+        )
+        parser.add_argument(
+            '--keep-old',
+            action='store_true',
+            help="Keep the previous table as postal_boundaries_old"
+        )
+        parser.add_argument(
+            '--skip-derived',
+            action='store_true',
+            help="Do not rebuild simplified boundaries and rollups afterwards "
+                 "(full geometry is served until rebuild_simplified_boundaries runs)"
+        )
+
+    def handle(self, *args, **options):
+        fields = {}
+        for item in options['field']:
+            column, _, source = item.partition('=')
+            if column not in COLUMNS or not source:
+                raise CommandError(f"Invalid --field {item!r}, expected COLUMN=SOURCE")
+            fields[column] = source
+
+        layer = options['layer']
+        if isinstance(layer, str) and layer.isdigit():
+            layer = int(layer)
+
+        try:
+            result = load_boundaries(
+                options['path'],
+                layer=layer,
+                srid=options['srid'],
+                fields=fields,
+                keep_old=options['keep_old']
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {result['loaded']} of {result['staged']} features "
+            f"(EPSG:{result['srid']}, {result['repaired']} repaired, "
+            f"{result['skipped']} without geometry skipped)"
+        ))
+
+        if options['skip_derived']:
+            return
+
+        # The swap emptied the simplified boundaries; rebuild them and the rollups
+        from stressmap.cache import bump_data_version
+        from stressmap.geometry import rebuild_simplified_boundaries
+        from stressmap.rollups import rebuild_rollups
+
+        for resolution, count in rebuild_simplified_boundaries().items():
+            self.stdout.write(f"{resolution}: {count} boundaries simplified")
+        for level, count in rebuild_rollups().items():
+            self.stdout.write(f"{level}: {count} outlines dissolved")
+        bump_data_version()
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from assessment.models import LastSubmission
+
+
+class Command(BaseCommand):
+    help = "Delete last-submission rows whose cooldown has expired (run daily)"
+
+    def handle(self, *args, **options):
+        deleted = LastSubmission.prune()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} expired keys deleted"))
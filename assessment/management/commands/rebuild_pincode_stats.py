@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from assessment.models import ArchivedPartition, PincodeDailyStats, PincodeStats
+
+
+class Command(BaseCommand):
+    help = "Recompute PincodeStats and the daily rollups for every pincode with set-based queries"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--prefix',
+            default='',
+            help="Only rebuild pincodes starting with this prefix"
+        )
+        parser.add_argument(
+            '--chunk-digits',
+            type=int,
+            default=0,
+            help="Rebuild in chunks, one per pincode prefix of this many digits"
+        )
+        parser.add_argument(
+            '--allow-archived',
+            action='store_true',
+            help="Rebuild even though archived responses will drop out of the totals"
+        )
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        digits = options['chunk_digits']
+        if prefix and not prefix.isdigit():
+            raise CommandError("--prefix must be digits")
+        if not 0 <= digits <= 6:
+            raise CommandError("--chunk-digits must be between 0 and 6")
+        try:
+            ArchivedPartition.check_rebuild_allowed(options['allow_archived'])
+        except ValueError as e:
+            raise CommandError(f"{e}; pass --allow-archived to rebuild anyway")
+
+        # Generated rather than read from the responses, which would scan
+        # every partition before the first chunk
+        width = digits - len(prefix)
+        chunks = [f'{prefix}{i:0{width}d}' for i in range(10 ** width)] if width > 0 else [prefix]
+
+        total = 0
+        for chunk in chunks:
+            count = PincodeStats.rebuild(prefix=chunk, allow_archived=True)
+            if not count:
+                continue
+            PincodeDailyStats.rebuild(prefix=chunk, allow_archived=True)
+            total += count
+            if chunk:
+                self.stdout.write(f"{chunk}*: {count} pincodes")
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt statistics for {total} pincodes"))
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0003_postalboundaries_delete_pincodegeometry'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pincodestats',
+            name='last_updated',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
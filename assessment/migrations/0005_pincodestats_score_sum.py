@@ -0,0 +1,29 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0004_pincodestats_last_updated_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pincodestats',
+            name='score_sum',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunSQL(
+            """
+            UPDATE assessment_pincodestats s
+            SET score_sum = r.score_sum
+            FROM (
+                SELECT pincode, SUM(score) AS score_sum
+                FROM assessment_assessmentresponse
+                GROUP BY pincode
+            ) r
+            WHERE r.pincode = s.pincode
+            """,
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,25 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0005_pincodestats_score_sum'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingSubmission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pincode', models.CharField(max_length=6)),
+                ('score', models.IntegerField()),
+                ('max_score', models.IntegerField(default=400)),
+                ('user_fingerprint', models.CharField(db_index=True, max_length=64)),
+                ('ip_address_hash', models.CharField(db_index=True, max_length=64)),
+                ('user_agent_hash', models.CharField(blank=True, max_length=64, null=True)),
+                ('submitted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
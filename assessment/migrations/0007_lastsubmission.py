@@ -0,0 +1,32 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0006_pendingsubmission'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LastSubmission',
+            fields=[
+                ('key', models.CharField(max_length=80, primary_key=True, serialize=False)),
+                ('submitted_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.RunSQL(
+            """
+            INSERT INTO assessment_lastsubmission (key, submitted_at)
+            SELECT 'fp:' || user_fingerprint, max(timestamp)
+            FROM assessment_assessmentresponse
+            GROUP BY user_fingerprint
+            UNION ALL
+            SELECT 'ip:' || ip_address_hash, max(timestamp)
+            FROM assessment_assessmentresponse
+            GROUP BY ip_address_hash
+            ON CONFLICT (key) DO NOTHING
+            """,
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_daily_stats(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO assessment_pincodedailystats (
+                pincode, day, total_assessments, score_sum,
+                excellent_count, good_count, moderate_count, concerning_count
+            )
+            SELECT
+                pincode,
+                (timestamp AT TIME ZONE %s)::date,
+                count(*),
+                sum(score),
+                count(*) FILTER (WHERE score * 100 <= max_score * 30),
+                count(*) FILTER (WHERE score * 100 > max_score * 30 AND score * 100 <= max_score * 50),
+                count(*) FILTER (WHERE score * 100 > max_score * 50 AND score * 100 <= max_score * 75),
+                count(*) FILTER (WHERE score * 100 > max_score * 75)
+            FROM assessment_assessmentresponse
+            GROUP BY 1, 2
+        """, [settings.TIME_ZONE])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0007_lastsubmission'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PincodeDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pincode', models.CharField(max_length=6)),
+                ('day', models.DateField()),
+                ('total_assessments', models.IntegerField(default=0)),
+                ('score_sum', models.BigIntegerField(default=0)),
+                ('excellent_count', models.IntegerField(default=0)),
+                ('good_count', models.IntegerField(default=0)),
+                ('moderate_count', models.IntegerField(default=0)),
+                ('concerning_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Pincode Daily Statistics',
+                'unique_together': {('pincode', 'day')},
+                'indexes': [models.Index(fields=['day'], name='assessment__day_e32f71_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,128 @@
+from django.db import migrations
+
+# Rebuild assessment_assessmentresponse as a table partitioned by month on
+# timestamp. Postgres requires the partition key in the primary key, so it
+# becomes (id, timestamp); id keeps a plain sequence because identity
+# columns are not supported on partitioned tables before Postgres 17.
+# The model state is unchanged.
+
+PARTITION_SQL = """
+ALTER TABLE assessment_assessmentresponse RENAME TO assessment_assessmentresponse_legacy;
+ALTER INDEX assessment_assessmentresponse_pkey RENAME TO assessment_assessmentresponse_legacy_pkey;
+
+CREATE TABLE assessment_assessmentresponse (
+    id bigint NOT NULL,
+    pincode varchar(6) NOT NULL,
+    score integer NOT NULL,
+    max_score integer NOT NULL,
+    user_fingerprint varchar(64) NOT NULL,
+    ip_address_hash varchar(64) NOT NULL,
+    timestamp timestamp with time zone NOT NULL,
+    user_agent_hash varchar(64) NULL,
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+CREATE TABLE assessment_assessmentresponse_default
+    PARTITION OF assessment_assessmentresponse DEFAULT;
+
+DO $$
+DECLARE
+    month date := date_trunc('month', coalesce(
+        (SELECT min(timestamp) FROM assessment_assessmentresponse_legacy), now()
+    ))::date;
+    last_month date := (date_trunc('month', now()) + interval '3 months')::date;
+BEGIN
+    WHILE month <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF assessment_assessmentresponse FOR VALUES FROM (%L) TO (%L)',
+            'assessment_assessmentresponse_y' || to_char(month, 'YYYY') || 'm' || to_char(month, 'MM'),
+            month,
+            (month + interval '1 month')::date
+        );
+        month := (month + interval '1 month')::date;
+    END LOOP;
+END $$;
+
+INSERT INTO assessment_assessmentresponse (
+    id, pincode, score, max_score, user_fingerprint, ip_address_hash, timestamp, user_agent_hash
+)
+SELECT id, pincode, score, max_score, user_fingerprint, ip_address_hash, timestamp, user_agent_hash
+FROM assessment_assessmentresponse_legacy;
+
+DROP TABLE assessment_assessmentresponse_legacy;
+
+CREATE SEQUENCE assessment_assessmentresponse_id_seq OWNED BY assessment_assessmentresponse.id;
+SELECT setval(
+    'assessment_assessmentresponse_id_seq',
+    coalesce((SELECT max(id) FROM assessment_assessmentresponse), 0) + 1,
+    false
+);
+ALTER TABLE assessment_assessmentresponse
+    ALTER COLUMN id SET DEFAULT nextval('assessment_assessmentresponse_id_seq');
+
+CREATE INDEX assessment_assessmentresponse_pincode_idx
+    ON assessment_assessmentresponse (pincode);
+CREATE INDEX assessment_assessmentresponse_user_fingerprint_idx
+    ON assessment_assessmentresponse (user_fingerprint);
+CREATE INDEX assessment_assessmentresponse_ip_address_hash_idx
+    ON assessment_assessmentresponse (ip_address_hash);
+CREATE INDEX assessment_assessmentresponse_timestamp_idx
+    ON assessment_assessmentresponse (timestamp);
+CREATE INDEX assessment__pincode_3312a3_idx
+    ON assessment_assessmentresponse (pincode, timestamp);
+CREATE INDEX assessment__user_fi_a5c657_idx
+    ON assessment_assessmentresponse (user_fingerprint, timestamp);
+"""
+
+UNPARTITION_SQL = """
+ALTER TABLE assessment_assessmentresponse RENAME TO assessment_assessmentresponse_partitioned;
+ALTER INDEX assessment__pincode_3312a3_idx RENAME TO assessment__pincode_3312a3_old;
+ALTER INDEX assessment__user_fi_a5c657_idx RENAME TO assessment__user_fi_a5c657_old;
+ALTER INDEX assessment_assessmentresponse_pkey RENAME TO assessment_assessmentresponse_partitioned_pkey;
+ALTER SEQUENCE assessment_assessmentresponse_id_seq RENAME TO assessment_assessmentresponse_partitioned_id_seq;
+
+CREATE TABLE assessment_assessmentresponse (
+    id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    pincode varchar(6) NOT NULL,
+    score integer NOT NULL,
+    max_score integer NOT NULL,
+    user_fingerprint varchar(64) NOT NULL,
+    ip_address_hash varchar(64) NOT NULL,
+    timestamp timestamp with time zone NOT NULL,
+    user_agent_hash varchar(64) NULL
+);
+
+INSERT INTO assessment_assessmentresponse (
+    id, pincode, score, max_score, user_fingerprint, ip_address_hash, timestamp, user_agent_hash
+)
+SELECT id, pincode, score, max_score, user_fingerprint, ip_address_hash, timestamp, user_agent_hash
+FROM assessment_assessmentresponse_partitioned;
+
+SELECT setval(
+    pg_get_serial_sequence('assessment_assessmentresponse', 'id'),
+    coalesce((SELECT max(id) FROM assessment_assessmentresponse), 0) + 1,
+    false
+);
+
+DROP TABLE assessment_assessmentresponse_partitioned;
+
+CREATE INDEX ON assessment_assessmentresponse (pincode);
+CREATE INDEX ON assessment_assessmentresponse (user_fingerprint);
+CREATE INDEX ON assessment_assessmentresponse (ip_address_hash);
+CREATE INDEX ON assessment_assessmentresponse (timestamp);
+CREATE INDEX assessment__pincode_3312a3_idx
+    ON assessment_assessmentresponse (pincode, timestamp);
+CREATE INDEX assessment__user_fi_a5c657_idx
+    ON assessment_assessmentresponse (user_fingerprint, timestamp);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0008_pincodedailystats'),
+    ]
+
+    operations = [
+        migrations.RunSQL(PARTITION_SQL, UNPARTITION_SQL),
+    ]
@@ -0,0 +1,42 @@
+import assessment.sketch
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0009_partition_assessmentresponse'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pincodestats',
+            name='score_histogram',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), default=assessment.sketch.empty_histogram, size=None),
+        ),
+        migrations.RunSQL(
+            """
+            WITH bins AS (
+                SELECT pincode,
+                       LEAST(GREATEST(score * 20 / max_score, 0), 19) AS bin,
+                       count(*) AS responses
+                FROM assessment_assessmentresponse
+                GROUP BY 1, 2
+            ),
+            histograms AS (
+                SELECT p.pincode,
+                       array_agg(coalesce(bins.responses, 0)::int ORDER BY g.bin) AS histogram
+                FROM (SELECT DISTINCT pincode FROM bins) p
+                CROSS JOIN generate_series(0, 19) AS g(bin)
+                LEFT JOIN bins ON bins.pincode = p.pincode AND bins.bin = g.bin
+                GROUP BY p.pincode
+            )
+            UPDATE assessment_pincodestats s
+            SET score_histogram = h.histogram
+            FROM histograms h
+            WHERE h.pincode = s.pincode
+            """,
+            migrations.RunSQL.noop,
+        ),
+    ]
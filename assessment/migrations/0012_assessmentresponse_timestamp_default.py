@@ -0,0 +1,25 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    auto_now_add -> default=timezone.now only changes how Django fills the
+    field, so the partitioned table itself is left alone
+    """
+
+    dependencies = [
+        ('assessment', '0011_archivedpartition'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='assessmentresponse',
+                    name='timestamp',
+                    field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+                ),
+            ],
+        ),
+    ]
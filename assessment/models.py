@@ -1,8 +1,142 @@
 from django.contrib.gis.db import models
+from django.contrib.postgres.fields import ArrayField
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Case, CharField, F, Value, When
+from django.db.models.lookups import LessThanOrEqual
+from django.db.models.functions import Cast, Greatest, Least, TruncDate
 from django.utils import timezone
 from datetime import timedelta
 import hashlib
 
+from .signals import stats_updated
+from .sketch import (
+    HISTOGRAM_BINS,
+    HistogramAdd,
+    empty_histogram,
+    histogram_add_sql,
+    histogram_bin,
+    histogram_quantiles,
+    one_hot,
+)
+
+# Stress bands: (upper bound of score percentage, level, color)
+# The last band catches everything above the previous bound.
+STRESS_LEVELS = [
+    (30, 'excellent', '#10b981'),
+    (50, 'good', '#fbbf24'),
+    (75, 'moderate', '#f97316'),
+    (100, 'concerning', '#ef4444'),
+]
+
+
+# Days a fingerprint or IP has to wait between submissions
+COOLDOWN_DAYS = 3
+
+
+def stress_level_for(average_score, max_score=400):
+    """Return stress level and color for an average score"""
+    percentage = (average_score / max_score) * 100
+
+    for upper, level, color in STRESS_LEVELS[:-1]:
+        if percentage <= upper:
+            return level, color
+    return STRESS_LEVELS[-1][1], STRESS_LEVELS[-1][2]
+
+
+def distribution_bucket_for(score, max_score=400):
+    """Distribution bucket (stress level name) of a single response"""
+    return stress_level_for(score, max_score)[0]
+
+
+def _stress_bands(field, max_score):
+    """
+    (score upper bound, value) per band and the value above the last bound,
+    the thresholds stress_level_for() applies; field is 'level' or 'color'
+    """
+    index = 1 if field == 'level' else 2
+    bands = [(band[0] * max_score / 100, band[index]) for band in STRESS_LEVELS[:-1]]
+    return bands, STRESS_LEVELS[-1][index]
+
+
+def stress_case(field='level', score='average_score', max_score=400):
+    """
+    SQL CASE classifying an average score column, the ORM counterpart of
+    stress_level_for(); field is 'level' or 'color'
+    """
+    bands, default = _stress_bands(field, max_score)
+    return Case(
+        *[
+            When(LessThanOrEqual(F(score), Value(upper)), then=Value(value))
+            for upper, value in bands
+        ],
+        default=Value(default),
+        output_field=CharField()
+    )
+
+
+def stress_case_sql(score_column, field='level', max_score=400):
+    """Raw SQL form of stress_case() for hand-written queries"""
+    bands, default = _stress_bands(field, max_score)
+    whens = ' '.join(
+        f"WHEN {score_column} <= {upper} THEN '{value}'" for upper, value in bands
+    )
+    return f"CASE {whens} ELSE '{default}' END"
+
+
+# Trend windows answered from PincodeDailyStats, in days
+STATS_WINDOWS = {'7d': 7, '30d': 30, '90d': 90}
+
+
+def window_start(window):
+    """First day inside a window such as '30d'; raises ValueError for unknown windows"""
+    if window not in STATS_WINDOWS:
+        raise ValueError(f"Unknown window: {window}")
+    return timezone.localdate() - timedelta(days=STATS_WINDOWS[window] - 1)
+
+
+def _sum_scores(entries, key):
+    """
+    Count, score sum and distribution of (pincode, score, max_score, day)
+    entries, grouped by key(entry)
+    """
+    totals = {}
+    for entry in entries:
+        row = totals.setdefault(key(entry), {
+            'total': 0, 'sum': 0,
+            **{level: 0 for _, level, _ in STRESS_LEVELS}
+        })
+        row['total'] += 1
+        row['sum'] += entry[1]
+        row[distribution_bucket_for(entry[1], entry[2])] += 1
+    return totals
+
+
+def _band_aggregates():
+    """Response count, score sum and cumulative per-band counts for annotate()"""
+    # score / max_score * 100 <= upper, kept in integers
+    return {
+        'total': models.Count('id'),
+        'total_score': models.Sum('score'),
+        **{
+            f'upto_{upper}': models.Count('id', filter=LessThanOrEqual(
+                F('score') * 100, F('max_score') * upper
+            ))
+            for upper, _, _ in STRESS_LEVELS[:-1]
+        }
+    }
+
+
+def _distribution_fields(row):
+    """Turn the cumulative band counts of a _band_aggregates() row into *_count fields"""
+    counts = {}
+    below = 0
+    for upper, level, _ in STRESS_LEVELS[:-1]:
+        counts[f'{level}_count'] = row[f'upto_{upper}'] - below
+        below = row[f'upto_{upper}']
+    counts[f'{STRESS_LEVELS[-1][1]}_count'] = row['total'] - below
+    return counts
+
+
 # ============ MODEL 1: For Pincode Geometry ============
 class PostalBoundaries(models.Model):
     ogc_fid = models.AutoField(primary_key=True)
@@ -33,7 +167,7 @@ class AssessmentResponse(models.Model):
     user_fingerprint = models.CharField(max_length=64, db_index=True)
     ip_address_hash = models.CharField(max_length=64, db_index=True)
     user_agent_hash = models.CharField(max_length=64, null=True, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
+    timestamp = models.DateTimeField(default=timezone.now, db_index=True)
     
     class Meta:
         app_label = 'assessment'
@@ -48,27 +182,31 @@ class AssessmentResponse(models.Model):
     
     @staticmethod
     def can_submit_assessment(fingerprint, ip_hash):
-        """Check if user can submit (7-day cooldown)"""
-        three_days_ago = timezone.now() - timedelta(days=3)
-        
-        recent = AssessmentResponse.objects.filter(
-            models.Q(user_fingerprint=fingerprint) | models.Q(ip_address_hash=ip_hash),
-            timestamp__gte=three_days_ago
-        ).first()
-        
-        if recent:
-            days_remaining = 3 - (timezone.now() - recent.timestamp).days
-            return False, days_remaining
-        return True, 0
+        """Check if user can submit (cooldown, answered from LastSubmission)"""
+        return LastSubmission.check(fingerprint, ip_hash)
 
 
 # ============ MODEL 3: For Pincode Statistics ============
+class PincodeStatsQuerySet(models.QuerySet):
+    def with_stress_level(self):
+        """Annotate `stress_level` and `color` in SQL, so they can be filtered on"""
+        return self.annotate(
+            stress_level=stress_case('level'),
+            color=stress_case('color')
+        )
+
+
 class PincodeStats(models.Model):
     """Aggregated statistics per pincode"""
     pincode = models.CharField(max_length=6, unique=True, primary_key=True)
     total_assessments = models.IntegerField(default=0)
     average_score = models.FloatField(default=0.0)
-    last_updated = models.DateTimeField(auto_now=True)
+    score_sum = models.BigIntegerField(default=0)
+    # Response counts per 5% score band, for quantiles (see sketch.py)
+    score_histogram = ArrayField(models.IntegerField(), default=empty_histogram)
+    last_updated = models.DateTimeField(auto_now=True, db_index=True)
+    
+    objects = PincodeStatsQuerySet.as_manager()
     
     # Distribution counts
     excellent_count = models.IntegerField(default=0)
@@ -85,45 +223,442 @@ class PincodeStats(models.Model):
     
     def get_stress_level(self):
         """Return stress level and color"""
-        percentage = (self.average_score / 400) * 100
-        
-        if percentage <= 30:
-            return 'excellent', '#10b981'
-        elif percentage <= 50:
-            return 'good', '#fbbf24'
-        elif percentage <= 75:
-            return 'moderate', '#f97316'
-        else:
-            return 'concerning', '#ef4444'
+        return stress_level_for(self.average_score)
+    
+    def get_quantiles(self):
+        """Approximate median and p90 score from the histogram"""
+        return histogram_quantiles(self.score_histogram)
     
-    def update_stats(self):
-        """Recalculate from all responses"""
-        responses = AssessmentResponse.objects.filter(pincode=self.pincode)
-        
-        if responses.exists():
-            self.total_assessments = responses.count()
-            self.average_score = responses.aggregate(
-                models.Avg('score')
-            )['score__avg']
-            
-            # Calculate distribution
-            self.excellent_count = 0
-            self.good_count = 0
-            self.moderate_count = 0
-            self.concerning_count = 0
-            
-            for resp in responses:
-                pct = (resp.score / resp.max_score) * 100
-                if pct <= 30:
-                    self.excellent_count += 1
-                elif pct <= 50:
-                    self.good_count += 1
-                elif pct <= 75:
-                    self.moderate_count += 1
-                else:
-                    self.concerning_count += 1
-            
-            self.save()
+    @classmethod
+    def record_score(cls, pincode, score, max_score=400):
+        """
+        Fold one new response into the pincode's statistics
+        A single UPDATE with F() expressions, so concurrent submissions
+        never lose an increment; the row is created on first use
+        Returns the updated stats
+        """
+        bucket = f'{distribution_bucket_for(score, max_score)}_count'
+        changes = {
+            'total_assessments': F('total_assessments') + 1,
+            'score_sum': F('score_sum') + score,
+            'average_score': Cast(F('score_sum') + score, models.FloatField())
+                             / (F('total_assessments') + 1),
+            bucket: F(bucket) + 1,
+            'score_histogram': HistogramAdd(
+                F('score_histogram'),
+                Value(one_hot(score, max_score), output_field=ArrayField(models.IntegerField()))
+            ),
+            'last_updated': timezone.now(),
+        }
+
+        with transaction.atomic():
+            PincodeDailyStats.record_scores([(pincode, score, max_score, timezone.localdate())])
+            if not cls.objects.filter(pincode=pincode).update(**changes):
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(
+                            pincode=pincode,
+                            total_assessments=1,
+                            score_sum=score,
+                            average_score=float(score),
+                            score_histogram=one_hot(score, max_score),
+                            **{bucket: 1}
+                        )
+                except IntegrityError:
+                    # Another submission created the row first
+                    cls.objects.filter(pincode=pincode).update(**changes)
+
+        stats_updated.send(sender=cls, pincodes=[pincode])
+        return cls.objects.get(pincode=pincode)
+
+    @classmethod
+    def record_scores(cls, entries):
+        """
+        Fold many (pincode, score, max_score, day) responses into the
+        statistics with one INSERT ... ON CONFLICT statement (plus one for
+        the daily rollups); `day` defaults to today
+        Returns the affected pincodes
+        """
+        today = timezone.localdate()
+        entries = [(pincode, score, max_score, day or today)
+                   for pincode, score, max_score, day in entries]
+        totals = _sum_scores(entries, key=lambda entry: entry[0])
+
+        if not totals:
+            return []
+
+        PincodeDailyStats.record_scores(entries)
+
+        histograms = {}
+        for pincode, score, max_score, _ in entries:
+            histograms.setdefault(pincode, empty_histogram())[histogram_bin(score, max_score)] += 1
+
+        # Sorted so concurrent flushers lock rows in the same order
+        pincodes = sorted(totals)
+        columns = [[totals[pincode][key] for pincode in pincodes]
+                   for key in ('total', 'sum', 'excellent', 'good', 'moderate', 'concerning')]
+        # Sent as array literals: unnest() would flatten a two-dimensional array
+        columns.append(['{%s}' % ','.join(map(str, histograms[pincode])) for pincode in pincodes])
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO {cls._meta.db_table} AS s (
+                    pincode, total_assessments, score_sum, average_score,
+                    excellent_count, good_count, moderate_count, concerning_count,
+                    score_histogram, last_updated
+                )
+                SELECT pincode, total, score_sum, score_sum::float8 / total,
+                       excellent, good, moderate, concerning, histogram::int[], now()
+                FROM unnest(
+                    %s::varchar[], %s::int[], %s::bigint[],
+                    %s::int[], %s::int[], %s::int[], %s::int[], %s::text[]
+                ) AS d(pincode, total, score_sum, excellent, good, moderate, concerning, histogram)
+                ON CONFLICT (pincode) DO UPDATE SET
+                    total_assessments = s.total_assessments + EXCLUDED.total_assessments,
+                    score_sum = s.score_sum + EXCLUDED.score_sum,
+                    average_score = (s.score_sum + EXCLUDED.score_sum)::float8
+                                    / (s.total_assessments + EXCLUDED.total_assessments),
+                    excellent_count = s.excellent_count + EXCLUDED.excellent_count,
+                    good_count = s.good_count + EXCLUDED.good_count,
+                    moderate_count = s.moderate_count + EXCLUDED.moderate_count,
+                    concerning_count = s.concerning_count + EXCLUDED.concerning_count,
+                    score_histogram = {histogram_add_sql('s.score_histogram', 'EXCLUDED.score_histogram')},
+                    last_updated = EXCLUDED.last_updated
+            """, [pincodes, *columns])
+
+        stats_updated.send(sender=cls, pincodes=pincodes)
+        return pincodes
+
+    @classmethod
+    def rebuild(cls, pincodes=None, prefix=None, allow_archived=False):
+        """
+        Recompute statistics from AssessmentResponse in one GROUP BY with
+        conditional counts, and write them back with one bulk upsert
+        Limited to `pincodes` and/or a pincode `prefix` when given
+        Refuses once partitions were archived, unless allow_archived
+        Returns the number of pincodes written
+        """
+        ArchivedPartition.check_rebuild_allowed(allow_archived)
+        responses = AssessmentResponse.objects.all()
+        if pincodes is not None:
+            responses = responses.filter(pincode__in=pincodes)
+        if prefix:
+            responses = responses.filter(pincode__startswith=prefix)
+
+        rows = (
+            responses
+            .order_by()
+            .values('pincode')
+            .annotate(**_band_aggregates())
+        )
+
+        # Second GROUP BY on (pincode, histogram bin)
+        histograms = {}
+        bins = (
+            responses
+            .order_by()
+            .annotate(bin=Least(
+                Greatest(F('score') * HISTOGRAM_BINS / F('max_score'), Value(0)),
+                Value(HISTOGRAM_BINS - 1)
+            ))
+            .values('pincode', 'bin')
+            .annotate(responses=models.Count('id'))
+        )
+        for row in bins:
+            histograms.setdefault(row['pincode'], empty_histogram())[row['bin']] = row['responses']
+
+        now = timezone.now()
+        stats = [
+            cls(
+                pincode=row['pincode'],
+                total_assessments=row['total'],
+                score_sum=row['total_score'],
+                average_score=row['total_score'] / row['total'],
+                score_histogram=histograms.get(row['pincode'], empty_histogram()),
+                last_updated=now,
+                **_distribution_fields(row)
+            )
+            for row in rows
+        ]
+
+        if stats:
+            cls.objects.bulk_create(
+                stats,
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=['pincode'],
+                update_fields=[
+                    'total_assessments', 'score_sum', 'average_score', 'score_histogram', 'last_updated',
+                    *(f'{level}_count' for _, level, _ in STRESS_LEVELS)
+                ]
+            )
+            stats_updated.send(sender=cls, pincodes=[item.pincode for item in stats])
+        return len(stats)
+
+    def update_stats(self, allow_archived=False):
+        """
+        Recalculate from all responses
+        Repair path for record_score(); submissions do not need it
+        """
+        if self.rebuild(pincodes=[self.pincode], allow_archived=allow_archived):
+            self.refresh_from_db()
+
+
+# ============ MODEL 4: Daily rollups for trends ============
+class PincodeDailyStats(models.Model):
+    """Per-pincode totals of one day, summed to answer trend windows"""
+    pincode = models.CharField(max_length=6)
+    day = models.DateField()
+    total_assessments = models.IntegerField(default=0)
+    score_sum = models.BigIntegerField(default=0)
+    excellent_count = models.IntegerField(default=0)
+    good_count = models.IntegerField(default=0)
+    moderate_count = models.IntegerField(default=0)
+    concerning_count = models.IntegerField(default=0)
+
+    class Meta:
+        app_label = 'assessment'
+        unique_together = [('pincode', 'day')]
+        indexes = [models.Index(fields=['day'])]
+        verbose_name_plural = "Pincode Daily Statistics"
+
+    def __str__(self):
+        return f"Daily: {self.pincode} - {self.day}"
+
+    @classmethod
+    def record_scores(cls, entries):
+        """Add (pincode, score, max_score, day) responses with one upsert"""
+        totals = _sum_scores(entries, key=lambda entry: (entry[0], entry[3]))
+        if not totals:
+            return
+
+        keys = sorted(totals)
+        columns = [[totals[key][name] for key in keys]
+                   for name in ('total', 'sum', 'excellent', 'good', 'moderate', 'concerning')]
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO {cls._meta.db_table} AS d (
+                    pincode, day, total_assessments, score_sum,
+                    excellent_count, good_count, moderate_count, concerning_count
+                )
+                SELECT * FROM unnest(
+                    %s::varchar[], %s::date[], %s::int[], %s::bigint[],
+                    %s::int[], %s::int[], %s::int[], %s::int[]
+                )
+                ON CONFLICT (pincode, day) DO UPDATE SET
+                    total_assessments = d.total_assessments + EXCLUDED.total_assessments,
+                    score_sum = d.score_sum + EXCLUDED.score_sum,
+                    excellent_count = d.excellent_count + EXCLUDED.excellent_count,
+                    good_count = d.good_count + EXCLUDED.good_count,
+                    moderate_count = d.moderate_count + EXCLUDED.moderate_count,
+                    concerning_count = d.concerning_count + EXCLUDED.concerning_count
+            """, [[key[0] for key in keys], [key[1] for key in keys], *columns])
+
+    @classmethod
+    def rebuild(cls, pincodes=None, prefix=None, allow_archived=False):
+        """
+        Recompute the daily rows from AssessmentResponse with one GROUP BY
+        Limited to `pincodes` and/or a pincode `prefix` when given
+        Refuses once partitions were archived, unless allow_archived
+        Returns the number of rows written
+        """
+        ArchivedPartition.check_rebuild_allowed(allow_archived)
+
+        responses = AssessmentResponse.objects.all()
+        existing = cls.objects.all()
+        if pincodes is not None:
+            responses = responses.filter(pincode__in=pincodes)
+            existing = existing.filter(pincode__in=pincodes)
+        if prefix:
+            responses = responses.filter(pincode__startswith=prefix)
+            existing = existing.filter(pincode__startswith=prefix)
+
+        rows = (
+            responses
+            .order_by()
+            .annotate(day=TruncDate('timestamp'))
+            .values('pincode', 'day')
+            .annotate(**_band_aggregates())
+        )
+
+        with transaction.atomic():
+            existing.delete()
+            created = cls.objects.bulk_create([
+                cls(
+                    pincode=row['pincode'],
+                    day=row['day'],
+                    total_assessments=row['total'],
+                    score_sum=row['total_score'],
+                    **_distribution_fields(row)
+                )
+                for row in rows
+            ], batch_size=1000)
+        return len(created)
+
+    @classmethod
+    def window_stats(cls, window, pincodes=None, min_assessments=1):
+        """
+        Sum the daily rows inside `window` ('7d', '30d' or '90d')
+        Returns unsaved PincodeStats per pincode, so callers can treat them
+        like lifetime stats
+        """
+        rows = cls.objects.filter(day__gte=window_start(window))
+        if pincodes is not None:
+            rows = rows.filter(pincode__in=pincodes)
+
+        rows = (
+            rows
+            .order_by()
+            .values('pincode')
+            .annotate(
+                total=models.Sum('total_assessments'),
+                total_score=models.Sum('score_sum'),
+                **{level: models.Sum(f'{level}_count') for _, level, _ in STRESS_LEVELS}
+            )
+            .filter(total__gte=max(min_assessments, 1))
+        )
+
+        return {
+            row['pincode']: PincodeStats(
+                pincode=row['pincode'],
+                total_assessments=row['total'],
+                score_sum=row['total_score'],
+                average_score=row['total_score'] / row['total'],
+                **{f'{level}_count': row[level] for _, level, _ in STRESS_LEVELS}
+            )
+            for row in rows
+        }
+
+
+# ============ MODEL 5: Buffered submissions ============
+class PendingSubmission(models.Model):
+    """
+    Validated submission waiting to be flushed into AssessmentResponse
+    Only used when ASSESSMENT_BUFFERED_SUBMISSIONS is on
+    """
+    pincode = models.CharField(max_length=6)
+    score = models.IntegerField()
+    max_score = models.IntegerField(default=400)
+    user_fingerprint = models.CharField(max_length=64, db_index=True)
+    ip_address_hash = models.CharField(max_length=64, db_index=True)
+    user_agent_hash = models.CharField(max_length=64, null=True, blank=True)
+    submitted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        app_label = 'assessment'
+
+    def __str__(self):
+        return f"Pending - {self.pincode} - Score: {self.score}/{self.max_score}"
+
+
+# ============ MODEL 6: Cooldown index ============
+class LastSubmission(models.Model):
+    """
+    Time of the latest submission per fingerprint hash ("fp:<hash>") and
+    per IP hash ("ip:<hash>"), so the cooldown is two primary-key lookups
+    """
+    key = models.CharField(max_length=80, primary_key=True)
+    submitted_at = models.DateTimeField()
+
+    class Meta:
+        app_label = 'assessment'
+
+    def __str__(self):
+        return f"{self.key} - {self.submitted_at}"
+
+    @staticmethod
+    def keys_for(fingerprint, ip_hash):
+        return sorted([f'fp:{fingerprint}', f'ip:{ip_hash}'])
+
+    @staticmethod
+    def _days_remaining(submitted_at, now):
+        return COOLDOWN_DAYS - (now - submitted_at).days
+
+    @classmethod
+    def check(cls, fingerprint, ip_hash):
+        """Return (can_submit, days_remaining)"""
+        now = timezone.now()
+        latest = (
+            cls.objects
+            .filter(key__in=cls.keys_for(fingerprint, ip_hash),
+                    submitted_at__gte=now - timedelta(days=COOLDOWN_DAYS))
+            .order_by('-submitted_at')
+            .values_list('submitted_at', flat=True)
+            .first()
+        )
+        if latest:
+            return False, cls._days_remaining(latest, now)
+        return True, 0
+
+    @classmethod
+    def claim(cls, fingerprint, ip_hash):
+        """
+        Atomically record a submission for both keys unless either is still
+        in its cooldown; concurrent claims for the same key serialize on the
+        row, so only one of them succeeds
+        Call inside the transaction that stores the submission
+        Returns (claimed, days_remaining)
+        """
+        now = timezone.now()
+        keys = cls.keys_for(fingerprint, ip_hash)
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(f"""
+                    INSERT INTO {cls._meta.db_table} AS l (key, submitted_at)
+                    VALUES (%s, %s), (%s, %s)
+                    ON CONFLICT (key) DO UPDATE SET submitted_at = EXCLUDED.submitted_at
+                    WHERE l.submitted_at < %s
+                """, [keys[0], now, keys[1], now, now - timedelta(days=COOLDOWN_DAYS)])
+                claimed = cursor.rowcount == len(keys)
+
+            if not claimed:
+                transaction.set_rollback(True)
+
+        if claimed:
+            return True, 0
+        can_submit, days_remaining = cls.check(fingerprint, ip_hash)
+        return False, days_remaining if not can_submit else COOLDOWN_DAYS
+
+    @classmethod
+    def prune(cls):
+        """
+        Delete keys whose cooldown has run out; they no longer block anything
+        Returns the number of rows deleted
+        """
+        cutoff = timezone.now() - timedelta(days=COOLDOWN_DAYS)
+        deleted, _ = cls.objects.filter(submitted_at__lt=cutoff).delete()
+        return deleted
+
+
+# ============ MODEL 7: Archived response partitions ============
+class ArchivedPartition(models.Model):
+    """Month of responses detached and exported by archive_response_partitions"""
+    month = models.DateField(primary_key=True)
+    path = models.CharField(max_length=500)
+    rows = models.BigIntegerField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        app_label = 'assessment'
+        ordering = ['month']
+
+    def __str__(self):
+        return f"Archived {self.month:%Y-%m} ({self.rows} responses)"
+
+    @classmethod
+    def check_rebuild_allowed(cls, allow_archived=False):
+        """
+        Rebuilding from AssessmentResponse would drop archived responses
+        from the lifetime totals, so it needs to be asked for explicitly
+        Raises ValueError
+        """
+        if not allow_archived and cls.objects.exists():
+            raise ValueError(
+                "Responses have been archived; rebuilding from the live responses "
+                "would drop them from the statistics"
+            )
 
 
 # Helper function
@@ -0,0 +1,171 @@
+"""
+Monthly range partitions of assessment_assessmentresponse
+
+The table is partitioned on timestamp (see migration 0009), one partition
+per calendar month plus a default partition that should stay empty.
+Partitions are created ahead of time and old ones can be archived:
+detached, exported as gzipped CSV and dropped.
+"""
+import gzip
+import logging
+import os
+import re
+from datetime import date
+from pathlib import Path
+
+from django.db import connection, transaction
+
+from .models import ArchivedPartition, AssessmentResponse
+
+logger = logging.getLogger(__name__)
+
+TABLE = AssessmentResponse._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+# DETACH locks the parent table, so it gives up instead of queueing writes
+DETACH_LOCK_TIMEOUT = '10s'
+
+_PARTITION_RE = re.compile(rf'^{TABLE}_y(\d{{4}})m(\d{{2}})$')
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_y{month.year:04d}m{month.month:02d}'
+
+
+def list_partitions():
+    """Months that have a partition, oldest first"""
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT c.relname
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass
+        """, [TABLE])
+        names = [row[0] for row in cursor.fetchall()]
+
+    months = []
+    for name in names:
+        match = _PARTITION_RE.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def create_partition(month):
+    """
+    Create and attach the partition for `month`
+    Rows of that month that landed in the default partition are moved into
+    it first, so attaching never fails
+    Returns False when it already existed
+    """
+    month = month_start(month)
+    if month in list_partitions():
+        return False
+
+    name = partition_name(month)
+    bounds = [month.isoformat(), add_months(month, 1).isoformat()]
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cursor.execute(f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE timestamp >= %s AND timestamp < %s
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        """, bounds)
+        if cursor.rowcount:
+            logger.warning(f"Moved {cursor.rowcount} rows from the default partition into {name}")
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)",
+            bounds
+        )
+    return True
+
+
+def ensure_partitions(months_ahead=3, today=None):
+    """
+    Make sure partitions exist from the current month up to `months_ahead`
+    months later
+    Returns the months created
+    """
+    current = month_start(today or date.today())
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if create_partition(month):
+            created.append(month)
+    return created
+
+
+def _export(cursor, name, path):
+    """COPY a partition into a gzipped CSV and fsync it"""
+    with open(path, 'wb') as raw:
+        with gzip.open(raw, 'wt', newline='') as export:
+            cursor.copy_expert(
+                f"COPY (SELECT * FROM {name} ORDER BY timestamp, id) TO STDOUT WITH (FORMAT csv, HEADER)",
+                export
+            )
+        raw.flush()
+        os.fsync(raw.fileno())
+
+
+def archive_partition(month, output_dir, drop=True):
+    """
+    Export the partition for `month` as gzipped CSV into `output_dir`, then
+    detach and drop it (unless drop=False)
+    The export reads the still attached partition without locking the
+    parent; only the detach runs in a short transaction, which is rolled
+    back if rows arrived after the export
+    Returns (path of the export, rows exported)
+    """
+    month = month_start(month)
+    name = partition_name(month)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = output_dir / f'{name}.csv.gz'
+
+    try:
+        # Count and export from one snapshot
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+            cursor.execute(f"SELECT count(*) FROM {name}")
+            rows = cursor.fetchone()[0]
+            _export(cursor, name, path)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"SET LOCAL lock_timeout = '{DETACH_LOCK_TIMEOUT}'")
+            cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+            cursor.execute(f"SELECT count(*) FROM {name}")
+            if cursor.fetchone()[0] != rows:
+                raise RuntimeError(f"{name} changed during the export, archive it again")
+
+            ArchivedPartition.objects.update_or_create(
+                month=month, defaults={'path': str(path), 'rows': rows}
+            )
+            if drop:
+                cursor.execute(f"DROP TABLE {name}")
+    except Exception:
+        path.unlink(missing_ok=True)
+        raise
+
+    return path, rows
+
+
+def archive_partitions_before(cutoff, output_dir, drop=True):
+    """Archive every monthly partition that ends on or before `cutoff`"""
+    cutoff = month_start(cutoff)
+    return [
+        (month, *archive_partition(month, output_dir, drop))
+        for month in list_partitions()
+        if add_months(month, 1) <= cutoff
+    ]
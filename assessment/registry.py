@@ -0,0 +1,97 @@
+"""
+Process-wide registry of valid pincodes
+
+Pincodes are kept as a sorted array of integers with their boundary
+details alongside, so validity and metadata lookups are a binary search
+instead of a database round-trip.
+"""
+import logging
+import sys
+from array import array
+from bisect import bisect_left
+
+from .locator import BOUNDARY_FIELDS, BoundaryWatcher
+from .models import PostalBoundaries
+
+logger = logging.getLogger(__name__)
+
+
+def _intern(value):
+    return sys.intern(value) if value else value
+
+
+class PincodeRegistry:
+    """
+    Sorted pincodes plus (office_name, division, region, circle) per pincode
+    The table signature is re-checked every PINCODE_REGISTRY_REFRESH_SECONDS
+    and the registry reloaded when postal_boundaries changed
+    """
+
+    def __init__(self):
+        self._codes = array('I')
+        self._details = []
+        self._watcher = BoundaryWatcher(self._load, 'PINCODE_REGISTRY_REFRESH_SECONDS')
+
+    def reload(self):
+        """Read every pincode from postal_boundaries"""
+        self._watcher.refresh()
+
+    def _load(self):
+        codes = array('I')
+        details = []
+
+        rows = (
+            PostalBoundaries.objects
+            .filter(pincode__isnull=False)
+            .order_by('pincode', 'ogc_fid')
+            .values_list(*BOUNDARY_FIELDS)
+            .iterator(chunk_size=5000)
+        )
+        for pincode, office_name, division, region, circle in rows:
+            pincode = pincode.strip()
+            if len(pincode) != 6 or not pincode.isdigit():
+                continue
+            code = int(pincode)
+            # Several offices can share a pincode; keep the first one
+            if codes and codes[-1] == code:
+                continue
+            codes.append(code)
+            details.append((office_name, _intern(division), _intern(region), _intern(circle)))
+
+        self._codes = codes
+        self._details = details
+        logger.info(f"Pincode registry loaded {len(codes)} pincodes")
+
+    def _index(self, pincode):
+        if not pincode or len(pincode) != 6 or not pincode.isdigit():
+            return None
+        self._watcher.ensure_fresh()
+        code = int(pincode)
+        index = bisect_left(self._codes, code)
+        if index < len(self._codes) and self._codes[index] == code:
+            return index
+        return None
+
+    def is_valid(self, pincode):
+        """True when the pincode exists in postal_boundaries"""
+        return self._index(pincode) is not None
+
+    def lookup(self, pincode):
+        """Boundary details of a pincode, or None when unknown"""
+        index = self._index(pincode)
+        if index is None:
+            return None
+        office_name, division, region, circle = self._details[index]
+        return {
+            'pincode': pincode,
+            'office_name': office_name,
+            'division': division,
+            'region': region,
+            'circle': circle,
+        }
+
+    def __len__(self):
+        return len(self._codes)
+
+
+registry = PincodeRegistry()
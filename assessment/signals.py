@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent with `pincodes` after PincodeStats rows were changed by a bulk or
+# F() update, which does not trigger post_save
+stats_updated = Signal()
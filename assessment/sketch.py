@@ -0,0 +1,82 @@
+"""
+Fixed-bin score histograms for per-pincode quantiles
+
+Each PincodeStats row keeps HISTOGRAM_BINS counts of responses by score
+percentage (5% wide bins). Histograms are updated by adding a one-hot
+array, merge by elementwise addition, and quantiles are read from the
+cumulative counts, so median/p90 never need the raw responses.
+"""
+from django.db.models import Func
+
+HISTOGRAM_BINS = 20
+
+# Elementwise sum of two int arrays; a missing or shorter array counts as zeros
+_HISTOGRAM_ADD = (
+    "ARRAY(SELECT coalesce(a, 0) + coalesce(b, 0) "
+    "FROM unnest({arrays}) WITH ORDINALITY AS t(a, b, i) ORDER BY i)"
+)
+
+
+def histogram_add_sql(left, right):
+    """SQL adding histogram expression `right` to `left`"""
+    return _HISTOGRAM_ADD.format(arrays=f'{left}, {right}')
+
+
+class HistogramAdd(Func):
+    """ORM form of histogram_add_sql(), e.g. HistogramAdd(F('score_histogram'), Value(...))"""
+    template = _HISTOGRAM_ADD.format(arrays='%(expressions)s')
+    arity = 2
+
+
+def empty_histogram():
+    return [0] * HISTOGRAM_BINS
+
+
+def histogram_bin(score, max_score=400):
+    """Bin index of one response"""
+    if max_score <= 0:
+        return 0
+    return min(max(score * HISTOGRAM_BINS // max_score, 0), HISTOGRAM_BINS - 1)
+
+
+def one_hot(score, max_score=400):
+    histogram = empty_histogram()
+    histogram[histogram_bin(score, max_score)] = 1
+    return histogram
+
+
+def merge_histograms(*histograms):
+    """Elementwise sum; None entries are skipped"""
+    merged = empty_histogram()
+    for histogram in histograms:
+        for i, count in enumerate(histogram or ()):
+            merged[i] += count
+    return merged
+
+
+def histogram_quantile(histogram, q, max_score=400):
+    """
+    Approximate q-quantile (0 < q <= 1) of the scores, interpolated
+    linearly inside the bin; None for an empty histogram
+    Accurate to one bin width (5% of max_score)
+    """
+    total = sum(histogram or ())
+    if not total:
+        return None
+
+    target = q * total
+    seen = 0
+    for i, count in enumerate(histogram):
+        if count and seen + count >= target:
+            fraction = (target - seen) / count
+            return round((i + fraction) / len(histogram) * max_score, 2)
+        seen += count
+    return float(max_score)
+
+
+def histogram_quantiles(histogram, max_score=400):
+    """Median and p90 as a dict, for API responses"""
+    return {
+        'p50': histogram_quantile(histogram, 0.5, max_score),
+        'p90': histogram_quantile(histogram, 0.9, max_score),
+    }
@@ -1,3 +1,103 @@
-from django.test import TestCase
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from .geocache import STRADDLES, LocationCache, geohash_bounds, geohash_encode
+from .sketch import (
+    HISTOGRAM_BINS,
+    empty_histogram,
+    histogram_bin,
+    histogram_quantile,
+    histogram_quantiles,
+    merge_histograms,
+    one_hot,
+)
+
+
+class GeohashTests(SimpleTestCase):
+    def test_known_values(self):
+        self.assertEqual(geohash_encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(geohash_encode(42.605, -5.603, 5), 'ezs42')
+
+    def test_shorter_precision_is_a_prefix(self):
+        self.assertEqual(geohash_encode(12.9716, 77.5946, 5), geohash_encode(12.9716, 77.5946, 9)[:5])
+
+    def test_bounds_contain_the_point(self):
+        lat, lng = 12.9716, 77.5946
+        min_lng, min_lat, max_lng, max_lat = geohash_bounds(geohash_encode(lat, lng, 7))
+        self.assertTrue(min_lng <= lng <= max_lng)
+        self.assertTrue(min_lat <= lat <= max_lat)
+
+    def test_bounds_of_a_known_cell(self):
+        min_lng, min_lat, max_lng, max_lat = geohash_bounds('ezs42')
+        self.assertAlmostEqual(min_lng, -5.625)
+        self.assertAlmostEqual(max_lng, -5.5810546875)
+        self.assertAlmostEqual(min_lat, 42.5830078125)
+        self.assertAlmostEqual(max_lat, 42.626953125)
+
+
+class LocationCacheTests(SimpleTestCase):
+    def test_least_recently_used_is_evicted(self):
+        cache = LocationCache(max_entries=2)
+        cache.set('a', {'pincode': '560001'})
+        cache.set('b', {'pincode': '560002'})
+        cache.get('a')
+        cache.set('c', STRADDLES)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), {'pincode': '560001'})
+        self.assertIs(cache.get('c'), STRADDLES)
+        self.assertEqual(cache.stats()['entries'], 2)
+
+    def test_expired_entries_miss(self):
+        cache = LocationCache(ttl=-1)
+        cache.set('a', {'pincode': '560001'})
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['entries'], 0)
+
+    def test_stats(self):
+        cache = LocationCache()
+        cache.set('a', {'pincode': '560001'})
+        cache.set('b', STRADDLES)
+        cache.get('a')
+        cache.get('b')
+        cache.get('c')
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['straddles'], stats['misses']), (1, 1, 1))
+        self.assertEqual(stats['hit_rate'], round(1 / 3, 4))
+
+
+class HistogramTests(SimpleTestCase):
+    def test_bins(self):
+        self.assertEqual(histogram_bin(0), 0)
+        self.assertEqual(histogram_bin(100), 5)
+        self.assertEqual(histogram_bin(400), HISTOGRAM_BINS - 1)
+        self.assertEqual(histogram_bin(-10), 0)
+        self.assertEqual(histogram_bin(500), HISTOGRAM_BINS - 1)
+        self.assertEqual(histogram_bin(10, max_score=0), 0)
+
+    def test_one_hot(self):
+        histogram = one_hot(200)
+        self.assertEqual(len(histogram), HISTOGRAM_BINS)
+        self.assertEqual(sum(histogram), 1)
+        self.assertEqual(histogram[10], 1)
+
+    def test_merge(self):
+        merged = merge_histograms(one_hot(100), None, one_hot(100), one_hot(300))
+        self.assertEqual(merged[5], 2)
+        self.assertEqual(merged[15], 1)
+        self.assertEqual(sum(merged), 3)
+        self.assertEqual(merge_histograms(), empty_histogram())
+
+    def test_quantiles(self):
+        histogram = merge_histograms(*(one_hot(score) for score in (100, 200, 300, 400)))
+        self.assertEqual(histogram_quantiles(histogram), {'p50': 220.0, 'p90': 392.0})
+        self.assertEqual(histogram_quantile(histogram, 1.0), 400.0)
+
+    def test_quantiles_are_within_one_bin(self):
+        scores = range(0, 400, 7)
+        histogram = merge_histograms(*(one_hot(score) for score in scores))
+        median = sorted(scores)[len(scores) // 2]
+        self.assertLessEqual(abs(histogram_quantile(histogram, 0.5) - median), 400 / HISTOGRAM_BINS)
+
+    def test_empty_histogram(self):
+        self.assertEqual(histogram_quantiles(empty_histogram()), {'p50': None, 'p90': None})
+        self.assertIsNone(histogram_quantile(None, 0.5))
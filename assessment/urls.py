@@ -9,4 +9,6 @@ urlpatterns = [
     path('api/all-pincode-stats/', views.get_all_pincode_stats, name='all_pincode_stats'),
     # ============ Pincode Geometry URLs ============
     path('api/get-pincode-from-location/', views.get_pincode_from_location, name='get_pincode_from_location'),
+    path('api/get-pincodes-from-locations/', views.get_pincodes_from_locations, name='get_pincodes_from_locations'),
+    path('api/location-cache-stats/', views.get_location_cache_stats, name='location_cache_stats'),
 ]
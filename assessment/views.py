@@ -3,13 +3,21 @@ from django.shortcuts import render
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from django.contrib.gis.geos import Point
+from .geocache import location_cache
+from .ingest import buffering_enabled, enqueue_submission
+from .locator import find_nearest_pincode_area, find_pincode_area, find_pincode_areas
+from .registry import registry
 from .models import (
-    PostalBoundaries, 
     AssessmentResponse, 
+    LastSubmission,
     PincodeStats, 
-    hash_data
+    PincodeDailyStats,
+    hash_data,
+    stress_level_for,
+    window_start
 )
+from django.conf import settings
+from django.db import transaction
 import json
 import logging
 # from django.db.models import Q
@@ -33,6 +41,28 @@ def get_user_agent(request):
     return request.META.get('HTTP_USER_AGENT', '')
 
 
+def parse_coordinates(item):
+    """
+    Read (lat, lng) from {"latitude": .., "longitude": ..} or [lat, lng]
+    Raises ValueError for missing or out-of-range values
+    """
+    if isinstance(item, dict):
+        lat, lng = item.get('latitude'), item.get('longitude')
+    elif isinstance(item, (list, tuple)) and len(item) == 2:
+        lat, lng = item
+    else:
+        raise ValueError("Expected an object or a [lat, lng] pair")
+
+    try:
+        lat = float(lat)
+        lng = float(lng)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid coordinates")
+    if not (-90 <= lat <= 90) or not (-180 <= lng <= 180):
+        raise ValueError("Invalid coordinate range")
+    return lat, lng
+
+
 # ============ PINCODE GEOMETRY VIEWS ============
 
 @csrf_exempt
@@ -41,6 +71,8 @@ def get_pincode_from_location(request):
     """
     Get pincode from latitude/longitude
     User sends their location, we return the pincode
+    Points just outside every boundary get the nearest one within
+    PINCODE_NEAREST_MAX_DISTANCE_M, flagged as approximate
     """
     try:
         data = json.loads(request.body)
@@ -65,22 +97,23 @@ def get_pincode_from_location(request):
                 'error': 'Invalid coordinates'
             }, status=400)
         
-        # Create point from coordinates (Note: PostGIS uses lng, lat order)
-        point = Point(lng, lat, srid=4326)
+        # Find which pincode boundary contains this point (lng, lat order)
+        pincode_area = find_pincode_area(lng, lat)
+        distance_m = None
         
-        # Find which pincode boundary contains this point
-        pincode_area = PostalBoundaries.objects.filter(
-            wkb_geometry__contains=point
-        ).first()
+        if not pincode_area:
+            pincode_area, distance_m = find_nearest_pincode_area(lng, lat)
         
         if pincode_area:
             return JsonResponse({
                 'success': True,
-                'pincode': pincode_area.pincode,
-                'office_name': pincode_area.office_name,
-                'division': pincode_area.division,
-                'region': pincode_area.region,
-                'circle': pincode_area.circle
+                'pincode': pincode_area['pincode'],
+                'office_name': pincode_area['office_name'],
+                'division': pincode_area['division'],
+                'region': pincode_area['region'],
+                'circle': pincode_area['circle'],
+                'approximate': distance_m is not None,
+                'distance_m': round(distance_m, 1) if distance_m is not None else None
             })
         else:
             return JsonResponse({
@@ -102,6 +135,89 @@ def get_pincode_from_location(request):
         }, status=500)
 
 
+@require_http_methods(["GET"])
+def get_location_cache_stats(request):
+    """
+    Hit/miss counters of this worker's reverse lookup cache
+    """
+    return JsonResponse({
+        'success': True,
+        'cache': location_cache.stats()
+    })
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def get_pincodes_from_locations(request):
+    """
+    Batch version of get_pincode_from_location
+    Accepts {"points": [...]}, a bare JSON array, or newline-delimited JSON
+    (Content-Type: application/x-ndjson); each point is an object with
+    latitude/longitude or a [lat, lng] pair. Results keep the input order.
+    """
+    try:
+        if request.content_type == 'application/x-ndjson':
+            items = [
+                json.loads(line)
+                for line in request.body.decode().splitlines()
+                if line.strip()
+            ]
+        else:
+            data = json.loads(request.body)
+            items = data.get('points') if isinstance(data, dict) else data
+        
+        if not isinstance(items, list):
+            return JsonResponse({
+                'success': False,
+                'error': 'A list of points is required'
+            }, status=400)
+        
+        max_points = getattr(settings, 'PINCODE_BATCH_MAX_POINTS', 1000)
+        if len(items) > max_points:
+            return JsonResponse({
+                'success': False,
+                'error': f'Too many points. At most {max_points} per request.'
+            }, status=413)
+        
+        # Validate every point, keeping the slot of the invalid ones
+        results = []
+        valid = []
+        for item in items:
+            try:
+                lat, lng = parse_coordinates(item)
+            except ValueError as e:
+                results.append({'success': False, 'error': str(e)})
+                continue
+            results.append({'latitude': lat, 'longitude': lng})
+            valid.append((len(results) - 1, lng, lat))
+        
+        areas = find_pincode_areas([(lng, lat) for _, lng, lat in valid])
+        for (index, _, _), area in zip(valid, areas):
+            if area:
+                results[index].update({'success': True, **area})
+            else:
+                results[index].update({'success': False, 'message': 'No pincode found for this location'})
+        
+        return JsonResponse({
+            'success': True,
+            'count': len(results),
+            'matched': sum(1 for area in areas if area),
+            'results': results
+        })
+    
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JsonResponse({
+            'success': False,
+            'error': 'Invalid JSON data'
+        }, status=400)
+    except Exception as e:
+        logger.error(f"Error resolving locations in batch: {str(e)}", exc_info=True)
+        return JsonResponse({
+            'success': False,
+            'error': 'Server error occurred'
+        }, status=500)
+
+
 # ============ ASSESSMENT VIEWS ============
 
 @csrf_exempt
@@ -187,8 +303,7 @@ def submit_assessment(request):
             }, status=400)
         
         # Verify pincode exists in database
-        pincode_exists = PostalBoundaries.objects.filter(pincode=pincode).exists()
-        if not pincode_exists:
+        if not registry.is_valid(pincode):
             return JsonResponse({
                 'error': 'Pincode not found in our database. Please verify your pincode.'
             }, status=404)
@@ -202,10 +317,32 @@ def submit_assessment(request):
         fingerprint_hash = hash_data(fingerprint)
         user_agent_hash = hash_data(user_agent) if user_agent else None
         
-        # Check if user can submit (7-day cooldown)
-        can_submit, days_remaining = AssessmentResponse.can_submit_assessment(
-            fingerprint_hash, ip_hash
-        )
+        # Claim the cooldown slot and store the submission together, so two
+        # parallel submissions cannot both get through
+        with transaction.atomic():
+            can_submit, days_remaining = LastSubmission.claim(fingerprint_hash, ip_hash)
+            
+            if can_submit:
+                if buffering_enabled():
+                    enqueue_submission(
+                        pincode=pincode,
+                        score=int(score),
+                        max_score=int(max_score),
+                        user_fingerprint=fingerprint_hash,
+                        ip_address_hash=ip_hash,
+                        user_agent_hash=user_agent_hash
+                    )
+                    assessment = None
+                else:
+                    assessment = AssessmentResponse.objects.create(
+                        pincode=pincode,
+                        score=int(score),
+                        max_score=int(max_score),
+                        user_fingerprint=fingerprint_hash,
+                        ip_address_hash=ip_hash,
+                        user_agent_hash=user_agent_hash
+                    )
+                    stats = PincodeStats.record_score(pincode, int(score), int(max_score))
         
         if not can_submit:
             return JsonResponse({
@@ -214,22 +351,26 @@ def submit_assessment(request):
                 'days_remaining': days_remaining
             }, status=429)
         
-        # Create assessment response
-        assessment = AssessmentResponse.objects.create(
-            pincode=pincode,
-            score=int(score),
-            max_score=int(max_score),
-            user_fingerprint=fingerprint_hash,
-            ip_address_hash=ip_hash,
-            user_agent_hash=user_agent_hash
-        )
+        if assessment is None:
+            # Report the stats as they will be once this submission is flushed
+            stats = PincodeStats.objects.filter(pincode=pincode).first()
+            total = (stats.total_assessments if stats else 0) + 1
+            average = ((stats.score_sum if stats else 0) + int(score)) / total
+            stress_level, color = stress_level_for(average)
+            
+            return JsonResponse({
+                'success': True,
+                'queued': True,
+                'message': 'Assessment submitted successfully',
+                'pincode': pincode,
+                'total_assessments': total,
+                'average_score': round(average, 2),
+                'stress_level': stress_level,
+                'color': color
+            }, status=202)
         
         logger.info(f"Assessment submitted - Pincode: {pincode}, Score: {score}/{max_score}")
         
-        # Update or create pincode statistics
-        stats, created = PincodeStats.objects.get_or_create(pincode=pincode)
-        stats.update_stats()
-        
         # Get stress level info
         stress_level, color = stats.get_stress_level()
         
@@ -261,6 +402,7 @@ def submit_assessment(request):
 def get_pincode_stats(request, pincode):
     """
     Get statistics for a specific pincode
+    Pass window=7d|30d|90d for the recent days only (from daily rollups)
     """
     try:
         if not pincode or not pincode.isdigit() or len(pincode) != 6:
@@ -268,21 +410,34 @@ def get_pincode_stats(request, pincode):
                 'error': 'Invalid pincode format'
             }, status=400)
         
-        stats = PincodeStats.objects.filter(pincode=pincode).first()
+        window = request.GET.get('window')
+        if window:
+            try:
+                start = window_start(window)
+            except ValueError:
+                return JsonResponse({
+                    'error': 'Invalid window, use 7d, 30d or 90d'
+                }, status=400)
+            stats = PincodeDailyStats.window_stats(window, pincodes=[pincode]).get(pincode)
+        else:
+            stats = PincodeStats.objects.filter(pincode=pincode).first()
+        
+        area = registry.lookup(pincode)
         
         if not stats:
             # Check if pincode exists in boundaries
-            pincode_exists = PostalBoundaries.objects.filter(pincode=pincode).exists()
-            if not pincode_exists:
+            if not area:
                 return JsonResponse({
                     'error': 'Pincode not found'
                 }, status=404)
             
             return JsonResponse({
                 'pincode': pincode,
+                'area': area,
                 'total_assessments': 0,
                 'average_score': 0,
                 'stress_level': 'no_data',
+                'window': window,
                 'message': 'No assessments found for this pincode yet'
             })
         
@@ -291,6 +446,7 @@ def get_pincode_stats(request, pincode):
         return JsonResponse({
             'success': True,
             'pincode': pincode,
+            'area': area,
             'total_assessments': stats.total_assessments,
             'average_score': round(stats.average_score, 2),
             'stress_level': stress_level,
@@ -301,7 +457,10 @@ def get_pincode_stats(request, pincode):
                 'moderate': stats.moderate_count,
                 'concerning': stats.concerning_count
             },
-            'last_updated': stats.last_updated.isoformat()
+            'quantiles': stats.get_quantiles(),
+            'window': window,
+            'window_start': start.isoformat() if window else None,
+            'last_updated': stats.last_updated.isoformat() if stats.last_updated else None
         })
     
     except Exception as e:
@@ -322,27 +481,27 @@ def get_all_pincode_stats(request):
         min_assessments = int(request.GET.get('min_assessments', 0))
         stress_level = request.GET.get('stress_level')
         
-        queryset = PincodeStats.objects.all()
+        queryset = PincodeStats.objects.with_stress_level()
         
         if min_assessments > 0:
             queryset = queryset.filter(total_assessments__gte=min_assessments)
-        
-        data = []
-        for stats in queryset:
-            level, color = stats.get_stress_level()
-            
-            # Filter by stress level if specified
-            if stress_level and level != stress_level:
-                continue
-            
-            data.append({
-                'pincode': stats.pincode,
-                'total_assessments': stats.total_assessments,
-                'average_score': round(stats.average_score, 2),
-                'stress_level': level,
-                'color': color,
-                'last_updated': stats.last_updated.isoformat()
-            })
+        if stress_level:
+            queryset = queryset.filter(stress_level=stress_level)
+        
+        data = [
+            {
+                'pincode': row['pincode'],
+                'total_assessments': row['total_assessments'],
+                'average_score': round(row['average_score'], 2),
+                'stress_level': row['stress_level'],
+                'color': row['color'],
+                'last_updated': row['last_updated'].isoformat()
+            }
+            for row in queryset.values(
+                'pincode', 'total_assessments', 'average_score',
+                'stress_level', 'color', 'last_updated'
+            )
+        ]
         
         return JsonResponse({
             'success': True,
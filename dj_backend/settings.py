@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 from dotenv import load_dotenv
+from dj_backend.static_headers import add_snapshot_headers
 
 load_dotenv()
 
@@ -145,6 +146,9 @@ STATICFILES_DIRS = [
 
 STATIC_ROOT = BASE_DIR / 'staticfiles' # For production
 
+# Baked map snapshots (manage.py bake_map_snapshots) are served as immutable
+WHITENOISE_ADD_HEADERS_FUNCTION = add_snapshot_headers
+
 if os.name == 'nt':
     GDAL_LIBRARY_PATH = os.getenv('GDAL_LIBRARY_PATH',)
     GEOS_LIBRARY_PATH = os.getenv('GEOS_LIBRARY_PATH',)
@@ -0,0 +1,4 @@
+def add_snapshot_headers(headers, path, url):
+    """WhiteNoise hook: versioned map snapshots never change once written"""
+    if '/map-snapshots/' in url and not url.endswith('/manifest.json'):
+        headers['Cache-Control'] = 'public, max-age=31536000, immutable'
@@ -7,6 +7,7 @@ For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 """
 
+import logging
 import os
 
 from django.core.wsgi import get_wsgi_application
@@ -14,3 +15,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dj_backend.settings')
 
 application = get_wsgi_application()
+
+# Warm per-process lookup tables so the first requests skip the load
+from assessment.registry import registry  # noqa: E402
+
+try:
+    registry.reload()
+except Exception:
+    logging.getLogger(__name__).warning("Pincode registry preload failed", exc_info=True)
@@ -25,10 +25,26 @@ function initMap() {
     loadMapData();
 }
 
+// Pick the baked snapshot when it is current, the live API otherwise
+async function resolveMapDataUrl() {
+    try {
+        const response = await fetch('/api/map-snapshot/manifest/');
+        if (response.ok) {
+            const manifest = await response.json();
+            if (manifest.fresh && manifest.map) {
+                return manifest.map;
+            }
+        }
+    } catch (error) {
+        console.warn('Map snapshot manifest unavailable:', error);
+    }
+    return '/api/map-data/';
+}
+
 // Load map data from API
 async function loadMapData() {
     try {
-        const response = await fetch('/api/map-data/');
+        const response = await fetch(await resolveMapDataUrl());
 
         if (!response.ok) {
             throw new Error('Failed to fetch map data');
@@ -0,0 +1,70 @@
+"""
+Versioned response cache for the stress map endpoints
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+
+from .models import DataVersion
+
+MAP_DATA_VERSION = 'map-data'
+
+
+def get_data_version(name=MAP_DATA_VERSION):
+    """Current version of the data behind the map responses"""
+    version = DataVersion.objects.filter(name=name).values_list('version', flat=True).first()
+    return version or 0
+
+
+def bump_data_version(name=MAP_DATA_VERSION):
+    """
+    Invalidate every cached response built from an older version
+    One UPDATE; the row is only inserted the first time
+    """
+    if DataVersion.objects.filter(name=name).update(version=F('version') + 1):
+        return
+    _, created = DataVersion.objects.get_or_create(name=name, defaults={'version': 1})
+    if not created:
+        # Inserted concurrently
+        DataVersion.objects.filter(name=name).update(version=F('version') + 1)
+
+
+def cache_key(prefix, params, version):
+    """Stable cache key for a set of request parameters"""
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+    return f'stressmap:{prefix}:v{version}:{digest}'
+
+
+def cached_json_response(request, prefix, params, build):
+    """
+    Serve the JSON bytes returned by build() from the cache
+    Entries are keyed by params and the current data version and carry a
+    strong ETag, so clients revalidate with If-None-Match and get a 304
+    """
+    key = cache_key(prefix, params, get_data_version())
+    entry = cache.get(key)
+
+    if entry is None:
+        body = build()
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()
+        entry = (etag, body)
+        cache.set(key, entry, getattr(settings, 'STRESSMAP_CACHE_TIMEOUT', 3600))
+
+    etag, body = entry
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        client_etags = parse_etags(if_none_match)
+        if etag in client_etags or '*' in client_etags:
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+
+    response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
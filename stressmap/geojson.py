@@ -0,0 +1,107 @@
+"""
+GeoJSON/TopoJSON serialization, including streaming responses
+"""
+import json
+import logging
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .topojson import DEFAULT_QUANTIZATION, feature_collection_to_topology
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round-trip by queryset.iterator()
+STREAM_CHUNK_SIZE = 500
+
+# Bytes buffered before a chunk is handed to the server
+STREAM_BUFFER_SIZE = 64 * 1024
+
+
+OUTPUT_FORMATS = ('geojson', 'topojson')
+
+
+def output_format_from_request(request):
+    """
+    Read `format=geojson|topojson` and the TopoJSON `quantization`
+    Raises ValueError for unknown formats or out-of-range quantization
+    """
+    output_format = request.GET.get('format', 'geojson').lower()
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown format: {output_format}")
+
+    quantization = int(request.GET.get('quantization', DEFAULT_QUANTIZATION))
+    if not 2 <= quantization <= 10 ** 8:
+        raise ValueError(f"Invalid quantization: {quantization}")
+    return output_format, quantization
+
+
+def serialize_collection(features, output_format='geojson', quantization=DEFAULT_QUANTIZATION,
+                         object_name='pincodes', **members):
+    """
+    Serialize GeoJSON Feature dicts as a FeatureCollection or a TopoJSON
+    Topology; `members` are extra top-level keys
+    Returns bytes
+    """
+    if output_format == 'topojson':
+        payload = feature_collection_to_topology(features, object_name, quantization)
+    else:
+        payload = {'type': 'FeatureCollection', 'features': features}
+
+    payload['count'] = len(features)
+    payload.update(members)
+    return json.dumps(payload, cls=DjangoJSONEncoder).encode()
+
+
+def wants_stream(request):
+    """True when the client asked for a streamed response"""
+    return request.GET.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def feature_json(properties, geometry):
+    """
+    Serialize one Feature, embedding the GEOS GeoJSON text as-is
+    instead of parsing it back into Python objects
+    """
+    return (
+        '{"type": "Feature", "properties": '
+        + json.dumps(properties, cls=DjangoJSONEncoder)
+        + ', "geometry": '
+        + geometry.geojson
+        + '}'
+    )
+
+
+def stream_feature_collection(features, **members):
+    """
+    Yield a FeatureCollection piece by piece
+    `features` yields (properties, geometry) pairs; `members` are extra
+    top-level keys written after the features together with `count`
+    """
+    buffer = ['{"type": "FeatureCollection", "features": [']
+    size = 0
+    count = 0
+
+    try:
+        for properties, geometry in features:
+            try:
+                chunk = feature_json(properties, geometry)
+            except Exception as e:
+                logger.warning(f"Error processing geometry for pincode {properties.get('pincode')}: {str(e)}")
+                continue
+
+            buffer.append(chunk if count == 0 else ',' + chunk)
+            size += len(chunk)
+            count += 1
+
+            if size >= STREAM_BUFFER_SIZE:
+                yield ''.join(buffer)
+                buffer = []
+                size = 0
+    except Exception as e:
+        # Headers are already sent, so the best we can do is log and stop
+        logger.error(f"Error while streaming features: {str(e)}", exc_info=True)
+        raise
+
+    members['count'] = count
+    buffer.append('], ' + json.dumps(members, cls=DjangoJSONEncoder)[1:])
+    yield ''.join(buffer)
@@ -0,0 +1,115 @@
+"""
+Resolution and viewport handling for pincode boundary geometries
+"""
+from django.contrib.gis.db.models import GeometryField
+from django.contrib.gis.geos import Polygon
+from django.db import connection, transaction
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import RESOLUTIONS, SimplifiedBoundary
+
+FULL_RESOLUTION = 'full'
+
+# Highest zoom level served by each simplified resolution
+ZOOM_RESOLUTIONS = [
+    (6, 'low'),
+    (9, 'medium'),
+    (12, 'high'),
+]
+
+
+def resolution_for_zoom(zoom):
+    """Pick the coarsest resolution that still looks right at a zoom level"""
+    for max_zoom, resolution in ZOOM_RESOLUTIONS:
+        if zoom <= max_zoom:
+            return resolution
+    return FULL_RESOLUTION
+
+
+def resolution_from_request(request):
+    """
+    Read `resolution` or `zoom` from the query string
+    Raises ValueError for unknown values
+    """
+    resolution = request.GET.get('resolution')
+    zoom = request.GET.get('zoom')
+
+    if resolution:
+        if resolution != FULL_RESOLUTION and resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution: {resolution}")
+        return resolution
+    if zoom is not None:
+        return resolution_for_zoom(int(zoom))
+    return FULL_RESOLUTION
+
+
+def bbox_from_request(request):
+    """
+    Read `bbox=minx,miny,maxx,maxy` (lng/lat degrees) from the query string
+    Returns a tuple of floats or None; raises ValueError when malformed
+    """
+    raw = request.GET.get('bbox')
+    if not raw:
+        return None
+
+    parts = [float(part) for part in raw.split(',')]
+    if len(parts) != 4:
+        raise ValueError("bbox needs four numbers")
+
+    minx, miny, maxx, maxy = parts
+    if not (-180 <= minx < maxx <= 180) or not (-90 <= miny < maxy <= 90):
+        raise ValueError(f"Invalid bbox: {raw}")
+    return minx, miny, maxx, maxy
+
+
+def filter_bbox(queryset, bbox):
+    """Keep boundaries intersecting bbox (uses the GiST index on wkb_geometry)"""
+    if bbox is None:
+        return queryset
+    envelope = Polygon.from_bbox(bbox)
+    envelope.srid = 4326
+    return queryset.filter(wkb_geometry__intersects=envelope)
+
+
+def with_display_geometry(queryset, resolution):
+    """
+    Annotate PostalBoundaries rows with `display_geometry` at the given
+    resolution, falling back to the full geometry when no simplified copy exists
+    """
+    if resolution == FULL_RESOLUTION:
+        return queryset.annotate(display_geometry=F('wkb_geometry')).defer('wkb_geometry')
+
+    simplified = SimplifiedBoundary.objects.filter(
+        ogc_fid=OuterRef('ogc_fid'),
+        resolution=resolution
+    ).values('geometry')[:1]
+
+    return queryset.annotate(
+        display_geometry=Coalesce(
+            Subquery(simplified, output_field=GeometryField()),
+            F('wkb_geometry')
+        )
+    ).defer('wkb_geometry')
+
+
+def rebuild_simplified_boundaries(resolutions=None):
+    """
+    Recompute simplified geometries from postal_boundaries
+    Returns the number of rows written per resolution
+    """
+    table = SimplifiedBoundary._meta.db_table
+    counts = {}
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        for resolution in resolutions or RESOLUTIONS:
+            cursor.execute(f"DELETE FROM {table} WHERE resolution = %s", [resolution])
+            cursor.execute(f"""
+                INSERT INTO {table} (ogc_fid, pincode, resolution, geometry)
+                SELECT ogc_fid, pincode, %s, ST_SimplifyPreserveTopology(wkb_geometry, %s)
+                FROM postal_boundaries
+                WHERE wkb_geometry IS NOT NULL
+            """, [resolution, RESOLUTIONS[resolution]])
+            counts[resolution] = cursor.rowcount
+
+    return counts
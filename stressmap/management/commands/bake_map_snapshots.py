@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from stressmap.snapshots import bake_snapshots
+
+
+class Command(BaseCommand):
+    help = "Write versioned, precompressed map snapshots into STATIC_ROOT for WhiteNoise"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep',
+            type=int,
+            default=3,
+            help="Number of snapshot versions to keep on disk"
+        )
+        parser.add_argument(
+            '--if-changed',
+            action='store_true',
+            help="Skip when the stats have not changed since the last snapshot"
+        )
+
+    def handle(self, *args, **options):
+        manifest = bake_snapshots(keep=options['keep'], only_if_changed=options['if_changed'])
+        if manifest is None:
+            self.stdout.write("Stats unchanged, snapshot is current")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Baked snapshot {manifest['version']} with {len(manifest['regions'])} region slices"
+        ))
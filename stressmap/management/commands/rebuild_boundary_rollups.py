@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from stressmap.cache import bump_data_version
+from stressmap.rollups import ROLLUP_LEVELS, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the dissolved division/region/circle outlines used by map-data?level="
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--level',
+            action='append',
+            choices=ROLLUP_LEVELS,
+            help="Only rebuild this level (can be repeated)"
+        )
+
+    def handle(self, *args, **options):
+        counts = rebuild_rollups(options['level'])
+        bump_data_version()
+        for level, count in counts.items():
+            self.stdout.write(self.style.SUCCESS(f"{level}: {count} outlines dissolved"))
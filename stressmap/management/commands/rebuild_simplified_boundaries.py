@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from stressmap.cache import bump_data_version
+from stressmap.geometry import rebuild_simplified_boundaries
+from stressmap.models import RESOLUTIONS
+
+
+class Command(BaseCommand):
+    help = "Rebuild the simplified pincode boundary geometries used at low zoom levels"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--resolution',
+            action='append',
+            choices=list(RESOLUTIONS),
+            help="Only rebuild this resolution (can be repeated)"
+        )
+
+    def handle(self, *args, **options):
+        counts = rebuild_simplified_boundaries(options['resolution'])
+        bump_data_version()
+        for resolution, count in counts.items():
+            self.stdout.write(self.style.SUCCESS(
+                f"{resolution}: {count} boundaries simplified (tolerance {RESOLUTIONS[resolution]})"
+            ))
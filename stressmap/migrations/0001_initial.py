@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-18 10:00
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimplifiedBoundary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ogc_fid', models.IntegerField()),
+                ('pincode', models.CharField(blank=True, db_index=True, max_length=10, null=True)),
+                ('resolution', models.CharField(max_length=10)),
+                ('geometry', django.contrib.gis.db.models.fields.GeometryField(srid=4326)),
+            ],
+            options={
+                'verbose_name': 'Simplified Boundary',
+                'verbose_name_plural': 'Simplified Boundaries',
+                'unique_together': {('resolution', 'ogc_fid')},
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:00
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stressmap', '0002_dataversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoundaryRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.CharField(choices=[('division', 'Division'), ('region', 'Region'), ('circle', 'Circle')], max_length=10)),
+                ('name', models.CharField(max_length=100)),
+                ('pincode_count', models.IntegerField(default=0)),
+                ('geometry', django.contrib.gis.db.models.fields.GeometryField(srid=4326)),
+            ],
+            options={
+                'unique_together': {('level', 'name')},
+            },
+        ),
+    ]
@@ -1,3 +1,59 @@
-from django.db import models
+from django.contrib.gis.db import models
 
-# Create your models here.
+# Simplification tolerances in degrees, coarsest first
+RESOLUTIONS = {
+    'low': 0.01,       # ~1 km, country-wide views
+    'medium': 0.002,   # ~200 m, state views
+    'high': 0.0005,    # ~50 m, city views
+}
+
+
+class SimplifiedBoundary(models.Model):
+    """Precomputed simplified copy of a postal boundary at one resolution"""
+    ogc_fid = models.IntegerField()
+    pincode = models.CharField(max_length=10, blank=True, null=True, db_index=True)
+    resolution = models.CharField(max_length=10)
+    geometry = models.GeometryField(srid=4326)
+
+    class Meta:
+        app_label = 'stressmap'
+        unique_together = [('resolution', 'ogc_fid')]
+        verbose_name = 'Simplified Boundary'
+        verbose_name_plural = 'Simplified Boundaries'
+
+    def __str__(self):
+        return f"{self.pincode} - {self.resolution}"
+
+
+class DataVersion(models.Model):
+    """Counter bumped whenever the data behind a cached response changes"""
+    name = models.CharField(max_length=50, primary_key=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        app_label = 'stressmap'
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+
+class BoundaryRollup(models.Model):
+    """Dissolved boundary of a division, region or circle"""
+    LEVEL_CHOICES = [
+        ('division', 'Division'),
+        ('region', 'Region'),
+        ('circle', 'Circle'),
+    ]
+
+    level = models.CharField(max_length=10, choices=LEVEL_CHOICES)
+    name = models.CharField(max_length=100)
+    pincode_count = models.IntegerField(default=0)
+    geometry = models.GeometryField(srid=4326)
+
+    class Meta:
+        app_label = 'stressmap'
+        unique_together = [('level', 'name')]
+
+    def __str__(self):
+        return f"{self.level}: {self.name}"
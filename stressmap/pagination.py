@@ -0,0 +1,88 @@
+"""
+Keyset (cursor) pagination over postal boundaries
+"""
+import base64
+import binascii
+import json
+
+from django.db import connections
+
+
+def encode_cursor(ogc_fid):
+    """Opaque cursor pointing just after the given boundary"""
+    raw = json.dumps({'after': ogc_fid}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Return the ogc_fid a cursor points after, or None for the first page
+    Raises ValueError for malformed cursors
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        after = json.loads(base64.urlsafe_b64decode(padded))['after']
+    except (binascii.Error, UnicodeDecodeError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(after, int):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return after
+
+
+def paginate_keyset(queryset, cursor, limit):
+    """
+    Fetch one page ordered by ogc_fid
+    Returns (rows, next_cursor); next_cursor is None on the last page
+    """
+    if limit <= 0:
+        raise ValueError("limit must be positive")
+
+    after = decode_cursor(cursor)
+    queryset = queryset.order_by('ogc_fid')
+    if after is not None:
+        queryset = queryset.filter(ogc_fid__gt=after)
+
+    # One extra row tells us whether another page exists
+    rows = list(queryset[:limit + 1])
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(rows[limit - 1].ogc_fid)
+    return rows, None
+
+
+def estimate_count(queryset):
+    """Row estimate from the query planner, without scanning the table"""
+    # QuerySet.explain() re-serializes the plan without its outer array,
+    # so run EXPLAIN directly
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def count_rows(queryset, mode):
+    """
+    Total for a paginated listing: 'exact' counts, 'estimate' asks the
+    planner, 'none' skips it
+    Returns (total, is_estimate)
+    """
+    if mode == 'exact':
+        return queryset.count(), False
+    if mode == 'estimate':
+        return estimate_count(queryset), True
+    if mode == 'none':
+        return None, False
+    raise ValueError(f"Unknown total mode: {mode}")
+
+
+def next_page_url(request, next_cursor):
+    """Same request with the cursor moved to the next page"""
+    if not next_cursor:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = next_cursor
+    return f"{request.path}?{params.urlencode()}"
@@ -0,0 +1,176 @@
+"""
+Division/region/circle rollups of pincode statistics for low zoom levels
+"""
+import json
+
+from django.db import connection, transaction
+
+from assessment.models import stress_case_sql
+from assessment.sketch import histogram_quantiles
+from .geojson import serialize_collection
+from .models import RESOLUTIONS, BoundaryRollup
+from .sql import stats_source
+from .topojson import DEFAULT_QUANTIZATION
+
+ROLLUP_LEVELS = [choice for choice, _ in BoundaryRollup.LEVEL_CHOICES]
+
+# Dissolved outlines are only drawn zoomed out
+ROLLUP_TOLERANCE = RESOLUTIONS['medium']
+
+
+def rebuild_rollups(levels=None):
+    """
+    Dissolve postal_boundaries into one simplified outline per
+    division/region/circle
+    Returns the number of outlines written per level
+    """
+    table = BoundaryRollup._meta.db_table
+    counts = {}
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        for level in levels or ROLLUP_LEVELS:
+            cursor.execute(f"DELETE FROM {table} WHERE level = %s", [level])
+            cursor.execute(f"""
+                INSERT INTO {table} (level, name, pincode_count, geometry)
+                SELECT
+                    %s,
+                    {level},
+                    count(DISTINCT pincode),
+                    ST_SimplifyPreserveTopology(ST_Union(ST_MakeValid(wkb_geometry)), %s)
+                FROM postal_boundaries
+                WHERE {level} IS NOT NULL AND wkb_geometry IS NOT NULL
+                GROUP BY {level}
+            """, [level, ROLLUP_TOLERANCE])
+            counts[level] = cursor.rowcount
+
+    return counts
+
+
+def fetch_rollup_stats(level, min_assessments=1, stress_level=None, region=None, bbox=None,
+                       window=None):
+    """
+    Score-weighted statistics per rollup area, classified in SQL, with the
+    merged score histogram and its outline as GeoJSON
+    Each pincode is counted once, under its first postal boundary
+    """
+    if level not in ROLLUP_LEVELS:
+        raise ValueError(f"Unknown level: {level}")
+
+    average = 'COALESCE(t.average_score, 0)'
+    area_conditions = ['pincode IS NOT NULL']
+    outline_conditions = ['r.level = %(level)s']
+    source, params = stats_source(window)
+    params.update(level=level, min_assessments=min_assessments)
+
+    if region:
+        area_conditions.append('UPPER(region) = UPPER(%(region)s)')
+        params['region'] = region
+    if stress_level:
+        outline_conditions.append(f"{stress_case_sql(average, 'level')} = %(stress_level)s")
+        params['stress_level'] = stress_level
+    if bbox:
+        outline_conditions.append(
+            'ST_Intersects(r.geometry, '
+            'ST_MakeEnvelope(%(minx)s, %(miny)s, %(maxx)s, %(maxy)s, 4326))'
+        )
+        params.update(zip(('minx', 'miny', 'maxx', 'maxy'), bbox))
+
+    query = f"""
+        WITH pincode_areas AS (
+            SELECT DISTINCT ON (pincode) pincode, {level} AS name
+            FROM postal_boundaries
+            WHERE {' AND '.join(area_conditions)}
+            ORDER BY pincode, ogc_fid
+        ),
+        totals AS (
+            SELECT
+                a.name,
+                count(*) AS pincodes_with_data,
+                sum(s.total_assessments) AS total_assessments,
+                sum(s.average_score * s.total_assessments)
+                    / NULLIF(sum(s.total_assessments), 0) AS average_score,
+                sum(s.excellent_count) AS excellent,
+                sum(s.good_count) AS good,
+                sum(s.moderate_count) AS moderate,
+                sum(s.concerning_count) AS concerning
+            FROM {source} s
+            JOIN pincode_areas a ON a.pincode = s.pincode
+            WHERE s.total_assessments >= %(min_assessments)s
+            GROUP BY a.name
+        ),
+        bins AS (
+            SELECT a.name, h.bin, sum(h.responses)::int AS responses
+            FROM {source} s
+            JOIN pincode_areas a ON a.pincode = s.pincode
+            CROSS JOIN LATERAL unnest(s.score_histogram) WITH ORDINALITY AS h(responses, bin)
+            WHERE s.total_assessments >= %(min_assessments)s
+            GROUP BY a.name, h.bin
+        ),
+        histograms AS (
+            SELECT name, array_agg(responses ORDER BY bin) AS histogram
+            FROM bins
+            GROUP BY name
+        )
+        SELECT
+            r.name, r.pincode_count, t.pincodes_with_data, t.total_assessments,
+            {average}, {stress_case_sql(average, 'level')}, {stress_case_sql(average, 'color')},
+            t.excellent, t.good, t.moderate, t.concerning,
+            hs.histogram, ST_AsGeoJSON(r.geometry)
+        FROM {BoundaryRollup._meta.db_table} r
+        JOIN totals t ON t.name = r.name
+        LEFT JOIN histograms hs ON hs.name = r.name
+        WHERE {' AND '.join(outline_conditions)}
+        ORDER BY r.name
+    """
+
+    with connection.cursor() as cursor:
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+
+def build_rollup_map_data(level, min_assessments=1, stress_level=None, region=None, bbox=None,
+                          output_format='geojson', quantization=DEFAULT_QUANTIZATION, window=None):
+    """
+    FeatureCollection (or TopoJSON) with one dissolved feature per rollup area
+    Returns the serialized JSON as bytes
+    """
+    features = []
+    for (name, pincode_count, pincodes_with_data, total, average, level_name, color,
+         excellent, good, moderate, concerning, histogram, geometry) in fetch_rollup_stats(
+            level, min_assessments, stress_level, region, bbox, window):
+        features.append({
+            'type': 'Feature',
+            'properties': {
+                'level': level,
+                'name': name,
+                'pincode_count': pincode_count,
+                'pincodes_with_data': pincodes_with_data,
+                'total_assessments': total,
+                'average_score': round(average, 2),
+                'stress_level': level_name,
+                'color': color,
+                'quantiles': histogram_quantiles(histogram),
+                'distribution': {
+                    'excellent': excellent,
+                    'good': good,
+                    'moderate': moderate,
+                    'concerning': concerning
+                }
+            },
+            'geometry': json.loads(geometry)
+        })
+
+    return serialize_collection(
+        features,
+        output_format,
+        quantization,
+        object_name=level,
+        filters={
+            'level': level,
+            'min_assessments': min_assessments,
+            'stress_level': stress_level,
+            'region': region,
+            'bbox': bbox,
+            'window': window
+        }
+    )
@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from assessment.models import PincodeStats
+from assessment.signals import stats_updated
+from .cache import bump_data_version
+
+
+@receiver([post_save, post_delete], sender=PincodeStats)
+@receiver(stats_updated, sender=PincodeStats)
+def invalidate_map_data(sender, **kwargs):
+    """
+    Any change to pincode statistics invalidates cached map responses
+    Bumped after commit, so the version row is not locked for the rest of
+    the submission transaction
+    """
+    transaction.on_commit(bump_data_version)
@@ -0,0 +1,145 @@
+"""
+Pre-baked, precompressed snapshots of the public map
+
+Snapshots live under STATIC_ROOT/map-snapshots/<version>/ so WhiteNoise
+serves them (and their .gz/.br variants) without touching a worker.
+manifest.json points at the current version.
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.text import slugify
+
+from assessment.models import PostalBoundaries
+from .cache import get_data_version
+from .geometry import FULL_RESOLUTION
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+SNAPSHOT_DIR = 'map-snapshots'
+MANIFEST_NAME = 'manifest.json'
+
+
+def snapshot_root():
+    return Path(settings.STATIC_ROOT) / SNAPSHOT_DIR
+
+
+def snapshot_url(version, name):
+    """Public URL of a snapshot file under STATIC_URL"""
+    prefix = settings.STATIC_URL
+    if not prefix.startswith(('/', 'http://', 'https://')):
+        prefix = '/' + prefix
+    return f"{prefix.rstrip('/')}/{SNAPSHOT_DIR}/{version}/{name}"
+
+
+def read_manifest():
+    """Current manifest, or None when nothing has been baked yet"""
+    try:
+        with open(snapshot_root() / MANIFEST_NAME, 'rb') as manifest:
+            return json.load(manifest)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _write_variants(path, body):
+    """Write a file plus the .gz and .br variants WhiteNoise looks for"""
+    path.write_bytes(body)
+    path.with_name(path.name + '.gz').write_bytes(gzip.compress(body, 9, mtime=0))
+    if brotli is not None:
+        path.with_name(path.name + '.br').write_bytes(brotli.compress(body, quality=11))
+
+
+def _write_json_atomic(path, payload):
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_text(json.dumps(payload, indent=2))
+    os.replace(tmp, path)
+
+
+def bake_snapshots(keep=3, only_if_changed=False):
+    """
+    Render the full map and one slice per region into a new version
+    directory, then point the manifest at it
+    Returns the manifest, or None when skipped because nothing changed
+    """
+    # Imported here: views import this module for the manifest endpoint
+    from .views import build_map_data
+
+    data_version = get_data_version()
+    manifest = read_manifest()
+    if only_if_changed and manifest and manifest.get('data_version') == data_version:
+        return None
+
+    full_map = build_map_data(1, None, None, FULL_RESOLUTION)
+    version = f"{data_version}-{hashlib.sha256(full_map).hexdigest()[:12]}"
+
+    root = snapshot_root()
+    target = root / version
+    staging = root / f".{version}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+
+    _write_variants(staging / 'map.json', full_map)
+
+    regions = {}
+    names = (
+        PostalBoundaries.objects
+        .filter(region__isnull=False)
+        .order_by('region')
+        .values_list('region', flat=True)
+        .distinct()
+    )
+    for region in names:
+        filename = f"region-{slugify(region)}.json"
+        _write_variants(staging / filename, build_map_data(1, None, region, FULL_RESOLUTION))
+        regions[region] = snapshot_url(version, filename)
+
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(staging, target)
+
+    manifest = {
+        'version': version,
+        'data_version': data_version,
+        'generated_at': timezone.now().isoformat(),
+        'map': snapshot_url(version, 'map.json'),
+        'regions': regions,
+    }
+    _write_json_atomic(root / MANIFEST_NAME, manifest)
+    prune_snapshots(keep, current=version)
+    return manifest
+
+
+def prune_snapshots(keep, current):
+    """Delete all but the newest `keep` version directories"""
+    versions = sorted(
+        (path for path in snapshot_root().iterdir()
+         if path.is_dir() and not path.name.startswith('.')),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True
+    )
+    for path in versions[keep:]:
+        if path.name != current:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def snapshot_file(version, name, accept_encoding):
+    """
+    Pick the best stored variant of a snapshot file for the client
+    Returns (path, content_encoding) or (None, None)
+    """
+    path = snapshot_root() / version / name
+    if not path.is_file():
+        return None, None
+    if 'br' in accept_encoding and path.with_name(name + '.br').is_file():
+        return path.with_name(name + '.br'), 'br'
+    if 'gzip' in accept_encoding and path.with_name(name + '.gz').is_file():
+        return path.with_name(name + '.gz'), 'gzip'
+    return path, None
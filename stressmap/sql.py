@@ -0,0 +1,124 @@
+"""
+SQL fragments shared by the raw PostGIS queries of the stress map
+"""
+import json
+
+from django.db import connection
+
+from assessment.models import (
+    STRESS_LEVELS,
+    PincodeDailyStats,
+    PincodeStats,
+    stress_case_sql,
+    window_start,
+)
+from .models import SimplifiedBoundary
+
+
+def stats_source(window=None):
+    """
+    FROM item with the PincodeStats columns used by the map queries: the
+    lifetime table, or the daily rollups summed over a trend window
+    Returns (sql, params)
+    """
+    if not window:
+        return PincodeStats._meta.db_table, {}
+
+    buckets = ', '.join(
+        f'sum({level}_count) AS {level}_count' for _, level, _ in STRESS_LEVELS
+    )
+    return f"""(
+        SELECT pincode,
+               sum(total_assessments) AS total_assessments,
+               sum(score_sum)::float8 / sum(total_assessments) AS average_score,
+               {buckets},
+               NULL::int[] AS score_histogram
+        FROM {PincodeDailyStats._meta.db_table}
+        WHERE day >= %(window_start)s
+        GROUP BY pincode
+        HAVING sum(total_assessments) > 0
+    )""", {'window_start': window_start(window)}
+
+
+def _properties_sql(properties):
+    """json_build_object() over (name, SQL expression) pairs"""
+    pairs = ', '.join(f"'{name}', {expression}" for name, expression in properties)
+    return f"json_build_object({pairs})"
+
+
+# Feature properties of the map endpoints as (name, SQL expression)
+MAP_PROPERTIES = [
+    ('pincode', 'b.pincode'),
+    ('office_name', 'b.office_name'),
+    ('division', 'b.division'),
+    ('region', 'b.region'),
+    ('circle', 'b.circle'),
+    ('total_assessments', 's.total_assessments'),
+    ('average_score', 'round(s.average_score::numeric, 2)'),
+    ('stress_level', stress_case_sql('s.average_score', 'level')),
+    ('color', stress_case_sql('s.average_score', 'color')),
+    ('distribution', _properties_sql([
+        ('excellent', 's.excellent_count'),
+        ('good', 's.good_count'),
+        ('moderate', 's.moderate_count'),
+        ('concerning', 's.concerning_count'),
+    ])),
+]
+
+
+def fetch_map_feature_collection(resolution, min_assessments=None, stress_level=None,
+                                 region=None, bbox=None, properties=MAP_PROPERTIES, members=None,
+                                 window=None):
+    """
+    Join boundaries with their stats, classify them and assemble the whole
+    FeatureCollection inside Postgres
+    Returns the serialized JSON as bytes
+    """
+    conditions = ['b.wkb_geometry IS NOT NULL']
+    source, params = stats_source(window)
+    params['resolution'] = resolution
+    extra_members = ''
+
+    for name, value in (members or {}).items():
+        extra_members += f", '{name}', %(member_{name})s::json"
+        params[f'member_{name}'] = json.dumps(value)
+
+    if min_assessments is not None:
+        conditions.append('s.total_assessments >= %(min_assessments)s')
+        params['min_assessments'] = min_assessments
+    if stress_level:
+        conditions.append(f"{stress_case_sql('s.average_score', 'level')} = %(stress_level)s")
+        params['stress_level'] = stress_level
+    if region:
+        conditions.append('UPPER(b.region) = UPPER(%(region)s)')
+        params['region'] = region
+    if bbox:
+        conditions.append(
+            'ST_Intersects(b.wkb_geometry, '
+            'ST_MakeEnvelope(%(minx)s, %(miny)s, %(maxx)s, %(maxy)s, 4326))'
+        )
+        params.update(zip(('minx', 'miny', 'maxx', 'maxy'), bbox))
+
+    query = f"""
+        SELECT json_build_object(
+            'type', 'FeatureCollection',
+            'features', COALESCE(json_agg(f.feature), '[]'::json),
+            'count', count(f.feature){extra_members}
+        )::text
+        FROM (
+            SELECT json_build_object(
+                'type', 'Feature',
+                'properties', {_properties_sql(properties)},
+                'geometry', ST_AsGeoJSON(COALESCE(g.geometry, b.wkb_geometry))::json
+            ) AS feature
+            FROM postal_boundaries b
+            JOIN {source} s ON s.pincode = b.pincode
+            LEFT JOIN {SimplifiedBoundary._meta.db_table} g
+                ON g.ogc_fid = b.ogc_fid AND g.resolution = %(resolution)s
+            WHERE {' AND '.join(conditions)}
+        ) f
+    """
+
+    with connection.cursor() as cursor:
+        cursor.execute(query, params)
+        return cursor.fetchone()[0].encode()
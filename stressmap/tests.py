@@ -1,3 +1,135 @@
-from django.test import TestCase
+import base64
 
-# Create your tests here.
+from django.contrib.gis.geos import Polygon
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from assessment.models import PostalBoundaries
+from .pagination import decode_cursor, encode_cursor
+from .topojson import feature_collection_to_topology
+
+
+class CursorCodecTests(SimpleTestCase):
+    def test_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor(42)), 42)
+
+    def test_empty_cursor_is_first_page(self):
+        self.assertIsNone(decode_cursor(''))
+        self.assertIsNone(decode_cursor(None))
+
+    def test_malformed_cursors(self):
+        not_json = base64.urlsafe_b64encode(b'not json').decode()
+        wrong_key = base64.urlsafe_b64encode(b'{"before": 3}').decode()
+        not_int = base64.urlsafe_b64encode(b'{"after": "3"}').decode()
+        not_object = base64.urlsafe_b64encode(b'[1, 2]').decode()
+        for cursor in ('%%%', 'abc', not_json, wrong_key, not_int, not_object):
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(ValueError):
+                    decode_cursor(cursor)
+
+
+class KeysetPaginationViewTests(TestCase):
+    """postal_boundaries is unmanaged, so the test creates it"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with connection.schema_editor() as editor:
+            editor.create_model(PostalBoundaries)
+        for i in range(3):
+            PostalBoundaries.objects.create(
+                pincode=f'56000{i}',
+                office_name=f'Office {i}',
+                region='Bangalore',
+                wkb_geometry=Polygon.from_bbox((77 + i, 12, 77.5 + i, 12.5)),
+            )
+
+    def test_first_page_with_default_total(self):
+        response = self.client.get('/api/pincode-boundaries/', {'cursor': '', 'limit': 2})
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()
+        self.assertEqual(len(data['features']), 2)
+        self.assertTrue(data['total_is_estimate'])
+        self.assertIsInstance(data['total'], int)
+        self.assertIsNotNone(data['next_cursor'])
+
+        response = self.client.get(
+            '/api/pincode-boundaries/', {'cursor': data['next_cursor'], 'limit': 2}
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data['features']), 1)
+        self.assertIsNone(data['next_cursor'])
+
+    def test_malformed_cursor_is_rejected(self):
+        response = self.client.get('/api/pincode-boundaries/', {'cursor': '%%%'})
+        self.assertEqual(response.status_code, 400)
+
+
+def _square(x, y):
+    return {
+        'type': 'Feature',
+        'properties': {'pincode': f'{x}{y}'},
+        'geometry': {
+            'type': 'Polygon',
+            'coordinates': [[[x, y], [x + 1, y], [x + 1, y + 1], [x, y + 1], [x, y]]],
+        },
+    }
+
+
+def _arc_id(index):
+    """Arc index with the reversal bit dropped"""
+    return ~index if index < 0 else index
+
+
+def _decode_ring(topology, arc_indexes):
+    """Absolute coordinates of a ring given by arc indexes"""
+    (kx, ky), (x0, y0) = topology['transform']['scale'], topology['transform']['translate']
+    points = []
+    for index in arc_indexes:
+        x = y = 0
+        arc = []
+        for dx, dy in topology['arcs'][_arc_id(index)]:
+            x += dx
+            y += dy
+            arc.append((x * kx + x0, y * ky + y0))
+        if index < 0:
+            arc.reverse()
+        points.extend(arc if not points else arc[1:])
+    return points
+
+
+class TopologyTests(SimpleTestCase):
+    def setUp(self):
+        # Two unit squares sharing the border x=1
+        self.features = [_square(0, 0), _square(1, 0)]
+        self.topology = feature_collection_to_topology(self.features, quantization=3)
+        self.geometries = self.topology['objects']['pincodes']['geometries']
+
+    def test_shared_border_is_stored_once(self):
+        self.assertEqual(len(self.topology['arcs']), 3)
+        arcs = [set(map(_arc_id, ring)) for geometry in self.geometries for ring in geometry['arcs']]
+        self.assertEqual(len(arcs[0] & arcs[1]), 1)
+
+    def test_shared_arc_is_reversed_for_the_neighbour(self):
+        first, second = (geometry['arcs'][0] for geometry in self.geometries)
+        shared = (set(map(_arc_id, first)) & set(map(_arc_id, second))).pop()
+        self.assertIn(shared, first)
+        self.assertIn(~shared, second)
+
+    def test_round_trip(self):
+        for feature, geometry in zip(self.features, self.geometries):
+            with self.subTest(pincode=feature['properties']['pincode']):
+                self.assertEqual(geometry['type'], 'Polygon')
+                self.assertEqual(geometry['properties'], feature['properties'])
+                ring = _decode_ring(self.topology, geometry['arcs'][0])
+                self.assertEqual(ring[0], ring[-1])
+                original = feature['geometry']['coordinates'][0]
+                self.assertEqual(set(ring), {tuple(map(float, point)) for point in original})
+
+    def test_empty_geometry(self):
+        topology = feature_collection_to_topology([{'properties': {}, 'geometry': None}])
+        geometry = topology['objects']['pincodes']['geometries'][0]
+        self.assertIsNone(geometry['type'])
+        self.assertEqual(topology['arcs'], [])
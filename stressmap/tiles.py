@@ -0,0 +1,94 @@
+"""
+Mapbox Vector Tiles for the stress map, rendered by PostGIS
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from assessment.models import stress_case_sql
+from .cache import get_data_version
+from .geometry import resolution_for_zoom
+from .models import SimplifiedBoundary
+
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+MAX_ZOOM = 18
+LAYER_NAME = 'pincodes'
+
+# Half the Web Mercator world width, in metres
+WORLD_HALF_SIZE = 20037508.342789244
+
+TILE_SQL = f"""
+WITH bounds AS (
+    SELECT ST_TileEnvelope(%(z)s, %(x)s, %(y)s) AS geom
+),
+features AS (
+    SELECT
+        ST_AsMVTGeom(
+            ST_SimplifyPreserveTopology(
+                ST_Transform(COALESCE(g.geometry, b.wkb_geometry), 3857),
+                %(tolerance)s
+            ),
+            bounds.geom, {TILE_EXTENT}, {TILE_BUFFER}, true
+        ) AS geom,
+        b.pincode,
+        b.office_name,
+        b.division,
+        b.region,
+        b.circle,
+        s.total_assessments,
+        round(s.average_score::numeric, 2)::float AS average_score,
+        {stress_case_sql('s.average_score', 'level')} AS stress_level,
+        {stress_case_sql('s.average_score', 'color')} AS color,
+        s.excellent_count,
+        s.good_count,
+        s.moderate_count,
+        s.concerning_count
+    FROM postal_boundaries b
+    JOIN assessment_pincodestats s ON s.pincode = b.pincode
+    LEFT JOIN {SimplifiedBoundary._meta.db_table} g
+        ON g.ogc_fid = b.ogc_fid AND g.resolution = %(resolution)s
+    CROSS JOIN bounds
+    WHERE b.wkb_geometry && ST_Transform(bounds.geom, 4326)
+)
+SELECT ST_AsMVT(features, '{LAYER_NAME}', {TILE_EXTENT}, 'geom')
+FROM features
+WHERE geom IS NOT NULL
+"""
+
+
+def is_valid_tile(z, x, y):
+    """Check tile coordinates are inside the XYZ pyramid"""
+    return 0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def tile_tolerance(z):
+    """Simplification tolerance of one tile pixel at zoom z, in metres"""
+    return (2 * WORLD_HALF_SIZE) / (2 ** z * TILE_EXTENT)
+
+
+def render_tile(z, x, y):
+    """
+    Render a single tile straight from PostGIS
+    Low zoom tiles start from the precomputed simplified geometries
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(TILE_SQL, {
+            'z': z,
+            'x': x,
+            'y': y,
+            'tolerance': tile_tolerance(z),
+            'resolution': resolution_for_zoom(z),
+        })
+        row = cursor.fetchone()
+    return bytes(row[0]) if row and row[0] else b''
+
+
+def get_tile(z, x, y):
+    """Return tile bytes, rendering and caching on a miss"""
+    key = f'stressmap:tile:v{get_data_version()}:{z}:{x}:{y}'
+    tile = cache.get(key)
+    if tile is None:
+        tile = render_tile(z, x, y)
+        cache.set(key, tile, getattr(settings, 'STRESSMAP_TILE_CACHE_TIMEOUT', 300))
+    return tile
@@ -0,0 +1,160 @@
+"""
+TopoJSON encoding of polygon FeatureCollections
+
+Shared borders between neighbouring pincodes are stored once as arcs, and
+coordinates are quantized to an integer grid and delta-encoded.
+"""
+
+DEFAULT_QUANTIZATION = 100000
+
+
+def _polygons(geometry):
+    """Polygons of a GeoJSON geometry as lists of rings"""
+    if geometry is None:
+        return []
+    kind = geometry['type']
+    if kind == 'Polygon':
+        return [geometry['coordinates']]
+    if kind == 'MultiPolygon':
+        return list(geometry['coordinates'])
+    if kind == 'GeometryCollection':
+        return [polygon for part in geometry['geometries'] for polygon in _polygons(part)]
+    return []
+
+
+def _bounds(features):
+    xs = []
+    ys = []
+    for feature in features:
+        for polygon in _polygons(feature.get('geometry')):
+            for ring in polygon:
+                for x, y, *_ in ring:
+                    xs.append(x)
+                    ys.append(y)
+    if not xs:
+        return 0.0, 0.0, 0.0, 0.0
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _quantize_ring(ring, x0, y0, kx, ky):
+    """Quantized, open ring without repeated points; None when degenerate"""
+    points = []
+    for x, y, *_ in ring:
+        point = (round((x - x0) / kx), round((y - y0) / ky))
+        if not points or points[-1] != point:
+            points.append(point)
+    if len(points) > 1 and points[0] == points[-1]:
+        points.pop()
+    return points if len(points) >= 3 else None
+
+
+def _find_junctions(rings):
+    """Points where neighbouring rings stop sharing a border"""
+    neighbours = {}
+    junctions = set()
+    for ring in rings:
+        count = len(ring)
+        for i, point in enumerate(ring):
+            pair = frozenset((ring[i - 1], ring[(i + 1) % count]))
+            seen = neighbours.setdefault(point, pair)
+            if seen != pair:
+                junctions.add(point)
+    return junctions
+
+
+def _cut_ring(ring, junctions):
+    """Split an open ring into closed-up arcs at its junctions"""
+    cuts = [i for i, point in enumerate(ring) if point in junctions]
+
+    if not cuts:
+        # Start at the smallest point so identical rings produce identical arcs
+        start = ring.index(min(ring))
+        rotated = ring[start:] + ring[:start]
+        return [rotated + [rotated[0]]]
+
+    start = cuts[0]
+    rotated = ring[start:] + ring[:start]
+    offsets = [i - start for i in cuts] + [len(ring)]
+    rotated.append(rotated[0])
+    return [rotated[a:b + 1] for a, b in zip(offsets, offsets[1:])]
+
+
+class _ArcIndex:
+    def __init__(self):
+        self.arcs = []
+        self._index = {}
+
+    def add(self, arc):
+        key = tuple(arc)
+        if key in self._index:
+            return self._index[key]
+        reverse = key[::-1]
+        if reverse in self._index:
+            return ~self._index[reverse]
+        self._index[key] = len(self.arcs)
+        self.arcs.append(arc)
+        return len(self.arcs) - 1
+
+
+def _delta_encode(arc):
+    encoded = [list(arc[0])]
+    for (px, py), (x, y) in zip(arc, arc[1:]):
+        encoded.append([x - px, y - py])
+    return encoded
+
+
+def feature_collection_to_topology(features, object_name='pincodes',
+                                   quantization=DEFAULT_QUANTIZATION):
+    """
+    Convert GeoJSON Feature dicts (Polygon/MultiPolygon) to a TopoJSON
+    Topology dict; feature properties are kept on each geometry
+    """
+    x0, y0, x1, y1 = _bounds(features)
+    kx = (x1 - x0) / (quantization - 1) or 1.0
+    ky = (y1 - y0) / (quantization - 1) or 1.0
+
+    # Quantize first so shared borders compare equal
+    quantized = []
+    for feature in features:
+        polygons = []
+        for polygon in _polygons(feature.get('geometry')):
+            rings = [_quantize_ring(ring, x0, y0, kx, ky) for ring in polygon]
+            if rings and rings[0] is not None:
+                polygons.append([ring for ring in rings if ring is not None])
+        quantized.append(polygons)
+
+    junctions = _find_junctions(
+        ring for polygons in quantized for polygon in polygons for ring in polygon
+    )
+
+    index = _ArcIndex()
+    geometries = []
+    for feature, polygons in zip(features, quantized):
+        arcs = [
+            [[index.add(arc) for arc in _cut_ring(ring, junctions)] for ring in polygon]
+            for polygon in polygons
+        ]
+        geometry = {'properties': feature.get('properties', {})}
+        if not arcs:
+            geometry['type'] = None
+        elif len(arcs) == 1:
+            geometry.update(type='Polygon', arcs=arcs[0])
+        else:
+            geometry.update(type='MultiPolygon', arcs=arcs)
+        geometries.append(geometry)
+
+    return {
+        'type': 'Topology',
+        'bbox': [x0, y0, x1, y1],
+        'transform': {
+            'scale': [kx, ky],
+            'translate': [x0, y0]
+        },
+        'objects': {
+            object_name: {
+                'type': 'GeometryCollection',
+                'geometries': geometries
+            }
+        },
+        'arcs': [_delta_encode(arc) for arc in index.arcs]
+    }
@@ -1,4 +1,5 @@
-from django.urls import path
+from django.conf import settings
+from django.urls import path, re_path
 from . import views
 
 urlpatterns = [
@@ -6,4 +7,12 @@ urlpatterns = [
     path('api/pincode-boundaries/', views.get_all_pincode_boundaries, name='pincode_boundaries'),
     path('api/pincode-boundary/<str:pincode>/', views.get_pincode_boundary, name='pincode_boundary'),
     path('api/map-data/', views.get_map_data, name='map_data'),
+    path('api/map-stats/', views.get_map_stats, name='map_stats'),
+    path('api/map-snapshot/manifest/', views.get_map_snapshot_manifest, name='map_snapshot_manifest'),
+    re_path(
+        r'^%smap-snapshots/(?P<version>[\w-]+)/(?P<name>[\w-]+\.json)$' % settings.STATIC_URL.lstrip('/'),
+        views.get_map_snapshot,
+        name='map_snapshot'
+    ),
+    path('api/tiles/<int:z>/<int:x>/<int:y>.mvt', views.get_stress_tile, name='stress_tile'),
 ]
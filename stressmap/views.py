@@ -1,53 +1,160 @@
 from django.shortcuts import render
-from assessment.models import PostalBoundaries, PincodeStats
+from assessment.models import PostalBoundaries, PincodeDailyStats, PincodeStats, window_start
 from django.views.decorators.http import require_http_methods
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse, FileResponse, Http404
+from django.conf import settings
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.dateparse import parse_datetime
+from .cache import cached_json_response, get_data_version
+from .geojson import (
+    STREAM_CHUNK_SIZE,
+    output_format_from_request,
+    serialize_collection,
+    stream_feature_collection,
+    wants_stream,
+)
+from .geometry import (
+    bbox_from_request,
+    filter_bbox,
+    resolution_from_request,
+    with_display_geometry,
+)
+from .snapshots import read_manifest, snapshot_file
+from .rollups import ROLLUP_LEVELS, build_rollup_map_data
+from .pagination import count_rows, next_page_url, paginate_keyset
+from .sql import MAP_PROPERTIES, fetch_map_feature_collection
+from .tiles import get_tile, is_valid_tile
+from .topojson import DEFAULT_QUANTIZATION
+from datetime import timedelta
 import json
 import logging
 
 logger = logging.getLogger(__name__)
 
-def stressmap_view(request):
-    """Return stress color and pincode wkb_geometry as GeoJSON"""
-    # Get all pincode stats in a dictionary for efficient lookup
-    stats_qs = PincodeStats.objects.all()
-    stats_dict = {s.pincode: s for s in stats_qs}
-    
-    features = []
-    
-    # Iterate through all postal boundaries
-    for geom in PostalBoundaries.objects.all():
+# stressmap_view names the division/region properties differently
+STRESSMAP_VIEW_PROPERTIES = [
+    ({'division': 'division_name', 'region': 'region_name'}.get(name, name), expression)
+    for name, expression in MAP_PROPERTIES
+]
+
+
+def geojson_in_db():
+    """True when FeatureCollections should be assembled by Postgres"""
+    return getattr(settings, 'STRESSMAP_GEOJSON_IN_DB', False)
+
+
+def cache_geometry(response):
+    """
+    Let clients and proxies keep boundary geometry for a long time;
+    statistics are polled separately through the stats delta feed
+    """
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=getattr(settings, 'STRESSMAP_GEOMETRY_MAX_AGE', 7 * 24 * 3600)
+    )
+    return response
+
+# Columns of the classified stats rows used by the map views
+STATS_VALUES = (
+    'pincode', 'total_assessments', 'average_score', 'stress_level', 'color',
+    'excellent_count', 'good_count', 'moderate_count', 'concerning_count'
+)
+
+
+def stats_rows(min_assessments=None, stress_level=None, window=None):
+    """
+    Pincode -> dict of STATS_VALUES, classified and filtered in SQL
+    With a trend `window` the rows come from the daily rollups instead
+    """
+    if window:
+        rows = {}
+        for pincode, stats in PincodeDailyStats.window_stats(window, min_assessments=min_assessments or 1).items():
+            level, color = stats.get_stress_level()
+            if stress_level and level != stress_level:
+                continue
+            rows[pincode] = {
+                name: getattr(stats, name)
+                for name in STATS_VALUES if name not in ('stress_level', 'color')
+            }
+            rows[pincode].update(stress_level=level, color=color)
+        return rows
+
+    queryset = PincodeStats.objects.with_stress_level()
+    if min_assessments is not None:
+        queryset = queryset.filter(total_assessments__gte=min_assessments)
+    if stress_level:
+        queryset = queryset.filter(stress_level=stress_level)
+    return {row['pincode']: row for row in queryset.values(*STATS_VALUES)}
+
+
+def _stress_features(stats_dict, queryset):
+    """Yield (properties, geometry) for boundaries that have stats"""
+    for geom in queryset:
         stats = stats_dict.get(geom.pincode)
         if not stats:
             continue  # Skip if no stats available for this pincode
-            
-        stress_level, color = stats.get_stress_level()
         
         # Make sure geometry exists and is valid
-        if geom.wkb_geometry:  # Fixed typo here
-            features.append({
-                "type": "Feature",
-                "geometry": json.loads(geom.wkb_geometry.geojson),  # Fixed typo here
-                "properties": {
-                    "pincode": geom.pincode,
-                    "office_name": geom.office_name,
-                    "division_name": geom.division,
-                    "region_name": geom.region,
-                    "circle": geom.circle,
-                    "total_assessments": stats.total_assessments,
-                    "average_score": round(stats.average_score, 2),
-                    "stress_level": stress_level,  # Fixed this line
-                    "color": color,
-                    "distribution": {
-                        "excellent": stats.excellent_count,
-                        "good": stats.good_count,
-                        "moderate": stats.moderate_count,
-                        "concerning": stats.concerning_count
-                    }
+        if geom.display_geometry:
+            yield {
+                "pincode": geom.pincode,
+                "office_name": geom.office_name,
+                "division_name": geom.division,
+                "region_name": geom.region,
+                "circle": geom.circle,
+                "total_assessments": stats['total_assessments'],
+                "average_score": round(stats['average_score'], 2),
+                "stress_level": stats['stress_level'],
+                "color": stats['color'],
+                "distribution": {
+                    "excellent": stats['excellent_count'],
+                    "good": stats['good_count'],
+                    "moderate": stats['moderate_count'],
+                    "concerning": stats['concerning_count']
                 }
-            })
+            }, geom.display_geometry
+
+
+def stressmap_view(request):
+    """
+    Return stress color and pincode wkb_geometry as GeoJSON
+    Pass stream=1 to stream the FeatureCollection with flat memory use
+    """
+    try:
+        resolution = resolution_from_request(request)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid resolution'}, status=400)
+
+    if geojson_in_db() and not wants_stream(request):
+        body = fetch_map_feature_collection(resolution, properties=STRESSMAP_VIEW_PROPERTIES)
+        return HttpResponse(body, content_type='application/json')
+
+    # Get all pincode stats in a dictionary for efficient lookup
+    stats_dict = stats_rows()
+    
+    queryset = with_display_geometry(PostalBoundaries.objects.all(), resolution)
     
-    return JsonResponse({  # Moved this outside the loop
+    if wants_stream(request):
+        features = _stress_features(
+            stats_dict, queryset.iterator(chunk_size=STREAM_CHUNK_SIZE)
+        )
+        return StreamingHttpResponse(
+            stream_feature_collection(features),
+            content_type='application/json'
+        )
+    
+    features = [
+        {
+            "type": "Feature",
+            "geometry": json.loads(geometry.geojson),
+            "properties": properties
+        }
+        for properties, geometry in _stress_features(stats_dict, queryset)
+    ]
+    
+    return JsonResponse({
         "type": "FeatureCollection",
         "features": features,
         "count": len(features)
@@ -65,35 +172,74 @@ def get_pincode_boundary(request, pincode):
                 'error': 'Invalid pincode format'
             }, status=400)
         
-        pincode_geom = PostalBoundaries.objects.filter(pincode=pincode).first()
+        resolution = resolution_from_request(request)
+        pincode_geom = with_display_geometry(
+            PostalBoundaries.objects.filter(pincode=pincode), resolution
+        ).first()
         
-        if not pincode_geom or not pincode_geom.wkb_geometry:
+        if not pincode_geom or not pincode_geom.display_geometry:
             return JsonResponse({
                 'error': 'Pincode boundary not found'
             }, status=404)
         
-        return JsonResponse({
+        return cache_geometry(JsonResponse({
             'type': 'Feature',
             'properties': {
                 'pincode': pincode_geom.pincode,
                 'office_name': pincode_geom.office_name,
                 'division': pincode_geom.division,
                 'region': pincode_geom.region,
-                'circle': pincode_geom.circle
+                'circle': pincode_geom.circle,
+                'resolution': resolution
             },
-            'geometry': json.loads(pincode_geom.wkb_geometry.geojson)
-        })
+            'geometry': json.loads(pincode_geom.display_geometry.geojson)
+        }))
     
+    except ValueError:
+        return JsonResponse({
+            'error': 'Invalid resolution'
+        }, status=400)
     except Exception as e:
         logger.error(f"Error fetching pincode boundary for {pincode}: {str(e)}", exc_info=True)
         return JsonResponse({'error': 'Server error'}, status=500)
 
 
+def _boundary_properties(geom):
+    """Descriptive properties of a postal boundary"""
+    return {
+        'pincode': geom.pincode,
+        'office_name': geom.office_name,
+        'division': geom.division,
+        'region': geom.region,
+        'circle': geom.circle
+    }
+
+
+def _boundary_features(rows):
+    """Build GeoJSON features for boundary rows, skipping broken geometries"""
+    features = []
+    for geom in rows:
+        try:
+            features.append({
+                'type': 'Feature',
+                'properties': _boundary_properties(geom),
+                'geometry': json.loads(geom.display_geometry.geojson)
+            })
+        except Exception as e:
+            logger.warning(f"Error processing geometry for pincode {geom.pincode}: {str(e)}")
+            continue
+    return features
+
+
 @require_http_methods(["GET"])
 def get_all_pincode_boundaries(request):
     """
     Get all pincode boundaries as GeoJSON FeatureCollection
-    Supports filtering and pagination
+    Supports filtering (region, circle, bbox=minx,miny,maxx,maxy) and pagination
+    Pass cursor= (empty for the first page) for keyset pagination on ogc_fid,
+    with total=estimate|exact|none
+    Pass stream=1 to stream every matching boundary (limit becomes optional)
+    Pass format=topojson (and quantization=) for a shared-arc topology
     """
     try:
         # Get query parameters
@@ -101,17 +247,63 @@ def get_all_pincode_boundaries(request):
         offset = int(request.GET.get('offset', 0))
         region = request.GET.get('region')
         circle = request.GET.get('circle')
+        bbox = bbox_from_request(request)
+        resolution = resolution_from_request(request)
+        output_format, quantization = output_format_from_request(request)
+        
+        if output_format == 'topojson' and wants_stream(request):
+            raise ValueError("TopoJSON output cannot be streamed")
         
         # Build queryset
-        queryset = PostalBoundaries.objects.filter(
+        queryset = filter_bbox(PostalBoundaries.objects.filter(
             wkb_geometry__isnull=False
-        )
+        ), bbox)
         
         if region:
             queryset = queryset.filter(region__iexact=region)
         if circle:
             queryset = queryset.filter(circle__iexact=circle)
         
+        if 'cursor' in request.GET and not wants_stream(request):
+            total, total_is_estimate = count_rows(
+                queryset, request.GET.get('total', 'estimate')
+            )
+            rows, next_cursor = paginate_keyset(
+                with_display_geometry(queryset, resolution),
+                request.GET['cursor'],
+                limit
+            )
+            
+            body = serialize_collection(
+                _boundary_features(rows),
+                output_format,
+                quantization,
+                total=total,
+                total_is_estimate=total_is_estimate,
+                limit=limit,
+                next_cursor=next_cursor,
+                next=next_page_url(request, next_cursor),
+                resolution=resolution
+            )
+            return cache_geometry(HttpResponse(body, content_type='application/json'))
+        
+        queryset = with_display_geometry(queryset, resolution)
+        
+        if wants_stream(request):
+            if 'limit' in request.GET:
+                queryset = queryset[offset:offset + limit]
+            elif offset:
+                queryset = queryset[offset:]
+            
+            features = (
+                (_boundary_properties(geom), geom.display_geometry)
+                for geom in queryset.iterator(chunk_size=STREAM_CHUNK_SIZE)
+            )
+            return cache_geometry(StreamingHttpResponse(
+                stream_feature_collection(features, offset=offset, resolution=resolution),
+                content_type='application/json'
+            ))
+        
         # Get total count before pagination
         total_count = queryset.count()
         
@@ -119,8 +311,68 @@ def get_all_pincode_boundaries(request):
         queryset = queryset[offset:offset + limit]
         
         # Build features
-        features = []
-        for geom in queryset:
+        body = serialize_collection(
+            _boundary_features(queryset),
+            output_format,
+            quantization,
+            total=total_count,
+            offset=offset,
+            limit=limit,
+            resolution=resolution
+        )
+        return cache_geometry(HttpResponse(body, content_type='application/json'))
+    
+    except ValueError as e:
+        return JsonResponse({
+            'error': 'Invalid pagination, format or resolution parameters'
+        }, status=400)
+    except Exception as e:
+        logger.error(f"Error fetching all boundaries: {str(e)}", exc_info=True)
+        return JsonResponse({'error': 'Server error'}, status=500)
+
+
+def build_map_data(min_assessments, stress_level, region, resolution, bbox=None,
+                   output_format='geojson', quantization=DEFAULT_QUANTIZATION, window=None):
+    """
+    Assemble the map FeatureCollection (or TopoJSON) and return it serialized
+    With a trend `window` the stats are summed from the daily rollups
+    """
+    filters = {
+        'min_assessments': min_assessments,
+        'stress_level': stress_level,
+        'region': region,
+        'bbox': bbox,
+        'resolution': resolution,
+        'window': window
+    }
+    
+    if geojson_in_db() and output_format == 'geojson':
+        return fetch_map_feature_collection(
+            resolution,
+            min_assessments=min_assessments,
+            stress_level=stress_level,
+            region=region,
+            bbox=bbox,
+            members={'filters': filters},
+            window=window
+        )
+    
+    # Get pincode stats, already filtered by stress level
+    stats_dict = stats_rows(min_assessments, stress_level, window)
+    
+    # Get geometries for pincodes that have assessments
+    geom_queryset = filter_bbox(PostalBoundaries.objects.filter(
+        pincode__in=stats_dict.keys(),
+        wkb_geometry__isnull=False
+    ), bbox)
+    
+    if region:
+        geom_queryset = geom_queryset.filter(region__iexact=region)
+    
+    features = []
+    for geom in with_display_geometry(geom_queryset, resolution):
+        stats = stats_dict.get(geom.pincode)
+        if stats:
             try:
                 features.append({
                     'type': 'Feature',
@@ -129,30 +381,25 @@ def get_all_pincode_boundaries(request):
                         'office_name': geom.office_name,
                         'division': geom.division,
                         'region': geom.region,
-                        'circle': geom.circle
+                        'circle': geom.circle,
+                        'total_assessments': stats['total_assessments'],
+                        'average_score': round(stats['average_score'], 2),
+                        'stress_level': stats['stress_level'],
+                        'color': stats['color'],
+                        'distribution': {
+                            'excellent': stats['excellent_count'],
+                            'good': stats['good_count'],
+                            'moderate': stats['moderate_count'],
+                            'concerning': stats['concerning_count']
+                        }
                     },
-                    'geometry': json.loads(geom.wkb_geometry.geojson)
+                    'geometry': json.loads(geom.display_geometry.geojson)
                 })
             except Exception as e:
                 logger.warning(f"Error processing geometry for pincode {geom.pincode}: {str(e)}")
                 continue
-        
-        return JsonResponse({
-            'type': 'FeatureCollection',
-            'features': features,
-            'count': len(features),
-            'total': total_count,
-            'offset': offset,
-            'limit': limit
-        })
     
-    except ValueError as e:
-        return JsonResponse({
-            'error': 'Invalid pagination parameters'
-        }, status=400)
-    except Exception as e:
-        logger.error(f"Error fetching all boundaries: {str(e)}", exc_info=True)
-        return JsonResponse({'error': 'Server error'}, status=500)
+    return serialize_collection(features, output_format, quantization, filters=filters)
 
 
 @require_http_methods(["GET"])
@@ -160,75 +407,66 @@ def get_map_data(request):
     """
     Combined endpoint: Returns GeoJSON with statistics
     Perfect for map visualization with color-coded boundaries
+    Responses are cached per filter combination until the stats change
+    Pass bbox=minx,miny,maxx,maxy (and zoom=) to fetch only the viewport
+    Pass level=division|region|circle for dissolved, score-weighted rollups
+    Pass format=topojson (and quantization=) for a shared-arc topology
+    Pass window=7d|30d|90d for stats of the recent days only
     """
     try:
         # Optional filters
         min_assessments = int(request.GET.get('min_assessments', 1))
         stress_level = request.GET.get('stress_level')
         region = request.GET.get('region')
+        bbox = bbox_from_request(request)
+        resolution = resolution_from_request(request)
+        level = request.GET.get('level', 'pincode')
+        output_format, quantization = output_format_from_request(request)
+        window = request.GET.get('window')
+        # The start day is part of the cache key, so windows roll over daily
+        start = window_start(window).isoformat() if window else None
         
-        # Get all pincode stats
-        stats_queryset = PincodeStats.objects.filter(
-            total_assessments__gte=min_assessments
-        )
-        
-        stats_dict = {stat.pincode: stat for stat in stats_queryset}
-        
-        # Get geometries for pincodes that have assessments
-        geom_queryset = PostalBoundaries.objects.filter(
-            pincode__in=stats_dict.keys(),
-            wkb_geometry__isnull=False
-        )
-        
-        if region:
-            geom_queryset = geom_queryset.filter(region__iexact=region)
-        
-        features = []
-        for geom in geom_queryset:
-            stats = stats_dict.get(geom.pincode)
-            if stats:
-                level, color = stats.get_stress_level()
-                
-                # Filter by stress level if specified
-                if stress_level and level != stress_level:
-                    continue
-                
-                try:
-                    features.append({
-                        'type': 'Feature',
-                        'properties': {
-                            'pincode': geom.pincode,
-                            'office_name': geom.office_name,
-                            'division': geom.division,
-                            'region': geom.region,
-                            'circle': geom.circle,
-                            'total_assessments': stats.total_assessments,
-                            'average_score': round(stats.average_score, 2),
-                            'stress_level': level,
-                            'color': color,
-                            'distribution': {
-                                'excellent': stats.excellent_count,
-                                'good': stats.good_count,
-                                'moderate': stats.moderate_count,
-                                'concerning': stats.concerning_count
-                            }
-                        },
-                        'geometry': json.loads(geom.wkb_geometry.geojson)
-                    })
-                except Exception as e:
-                    logger.warning(f"Error processing geometry for pincode {geom.pincode}: {str(e)}")
-                    continue
-        
-        return JsonResponse({
-            'type': 'FeatureCollection',
-            'features': features,
-            'count': len(features),
-            'filters': {
+        if level != 'pincode':
+            if level not in ROLLUP_LEVELS:
+                raise ValueError(f"Unknown level: {level}")
+            params = {
+                'level': level,
                 'min_assessments': min_assessments,
                 'stress_level': stress_level,
-                'region': region
+                'region': region.lower() if region else None,
+                'bbox': bbox,
+                'format': output_format,
+                'quantization': quantization,
+                'window': window,
+                'window_start': start
             }
-        })
+            return cached_json_response(
+                request, 'map-data', params,
+                lambda: build_rollup_map_data(
+                    level, min_assessments, stress_level, region, bbox,
+                    output_format, quantization, window
+                )
+            )
+        
+        params = {
+            'min_assessments': min_assessments,
+            'stress_level': stress_level,
+            'region': region.lower() if region else None,
+            'bbox': bbox,
+            'resolution': resolution,
+            'format': output_format,
+            'quantization': quantization,
+            'window': window,
+            'window_start': start
+        }
+        
+        return cached_json_response(
+            request, 'map-data', params,
+            lambda: build_map_data(
+                min_assessments, stress_level, region, resolution, bbox,
+                output_format, quantization, window
+            )
+        )
     
     except ValueError:
         return JsonResponse({
@@ -240,5 +478,138 @@ def get_map_data(request):
             'error': 'Server error occurred'
         }, status=500)
 
+def build_stats_delta(since):
+    """
+    Statistics of every pincode updated after `since` (all when None),
+    without geometry
+    Rows updated shortly before `since` are sent again so saves that
+    committed late are not missed; applying a row twice is harmless
+    """
+    queryset = PincodeStats.objects.with_stress_level().order_by('last_updated', 'pincode')
+    if since is not None:
+        overlap = getattr(settings, 'STRESSMAP_STATS_DELTA_OVERLAP_SECONDS', 5)
+        queryset = queryset.filter(last_updated__gt=since - timedelta(seconds=overlap))
+    
+    stats = {}
+    next_since = since
+    for row in queryset.values(*STATS_VALUES, 'last_updated'):
+        stats[row['pincode']] = {
+            'total_assessments': row['total_assessments'],
+            'average_score': round(row['average_score'], 2),
+            'stress_level': row['stress_level'],
+            'color': row['color'],
+            'distribution': {
+                'excellent': row['excellent_count'],
+                'good': row['good_count'],
+                'moderate': row['moderate_count'],
+                'concerning': row['concerning_count']
+            }
+        }
+        next_since = row['last_updated']
+    
+    return json.dumps({
+        'success': True,
+        'full': since is None,
+        'since': since.isoformat() if since else None,
+        'next_since': next_since.isoformat() if next_since else None,
+        'version': get_data_version(),
+        'count': len(stats),
+        'stats': stats
+    }).encode()
+
+
+@require_http_methods(["GET"])
+def get_map_stats(request):
+    """
+    Stats-only feed for clients that keep the geometry cached
+    Omit `since` for every pincode; afterwards pass the returned
+    `next_since` to receive only pincodes whose stats changed
+    """
+    try:
+        since = request.GET.get('since')
+        if since:
+            since = parse_datetime(since.replace(' ', '+'))
+            if since is None:
+                raise ValueError("Invalid since timestamp")
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+        else:
+            since = None
+        
+        return cached_json_response(
+            request, 'map-stats',
+            {'since': since.isoformat() if since else None},
+            lambda: build_stats_delta(since)
+        )
+    
+    except ValueError:
+        return JsonResponse({
+            'error': 'Invalid since timestamp'
+        }, status=400)
+    except Exception as e:
+        logger.error(f"Error fetching map stats: {str(e)}", exc_info=True)
+        return JsonResponse({
+            'error': 'Server error occurred'
+        }, status=500)
+
+@require_http_methods(["GET"])
+def get_stress_tile(request, z, x, y):
+    """
+    Get a Mapbox Vector Tile of pincode boundaries with their statistics
+    Only the pincodes visible in the tile are fetched, clipped and simplified
+    """
+    if not is_valid_tile(z, x, y):
+        return JsonResponse({
+            'error': 'Invalid tile coordinates'
+        }, status=400)
+
+    try:
+        tile = get_tile(z, x, y)
+    except Exception as e:
+        logger.error(f"Error rendering tile {z}/{x}/{y}: {str(e)}", exc_info=True)
+        return JsonResponse({'error': 'Server error'}, status=500)
+
+    return HttpResponse(tile, content_type='application/vnd.mapbox-vector-tile')
+
+@require_http_methods(["GET"])
+def get_map_snapshot_manifest(request):
+    """
+    Tiny manifest telling the page which baked map snapshot to load
+    `fresh` is false once stats changed after the snapshot was baked
+    """
+    manifest = read_manifest()
+    if not manifest:
+        return JsonResponse({
+            'error': 'No map snapshot available'
+        }, status=404)
+    
+    try:
+        manifest['fresh'] = manifest.get('data_version') == get_data_version()
+    except Exception as e:
+        logger.error(f"Error reading map data version: {str(e)}", exc_info=True)
+        manifest['fresh'] = False
+    
+    response = JsonResponse(manifest)
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+@require_http_methods(["GET"])
+def get_map_snapshot(request, version, name):
+    """
+    Serve a baked snapshot that WhiteNoise has not indexed yet
+    (files written after the worker started)
+    """
+    path, encoding = snapshot_file(version, name, request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if path is None:
+        raise Http404('Snapshot not found')
+    
+    response = FileResponse(open(path, 'rb'), content_type='application/json')
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Vary'] = 'Accept-Encoding'
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
 def stressmap(request):
     return render(request, 'stressmap.html', {})
\ No newline at end of file